@@ -9,10 +9,14 @@ class TupleBinHeap:
 				self.heapList[i // 2] = self.heapList[i]
 				self.heapList[i] = tmp
 			i = i // 2
-	def insert(self,k):
+	def insert(self,k,key=None,g=None,h=0):
 		self.heapList.append(k)
 		self.currentSize = self.currentSize + 1
 		self.percUp(self.currentSize)
+		return True
+
+	def improves(self,key,g):
+		return True
 
 	def percDown(self,i):
 		while (i * 2) <= self.currentSize:
@@ -31,6 +35,9 @@ class TupleBinHeap:
 				return i * 2
 			else:
 				return i * 2 + 1
+	def top(self):
+		return self.heapList[1]
+
 	def pop(self):
 		retval = self.heapList[1]
 		self.heapList[1] = self.heapList[self.currentSize]
@@ -39,3 +46,97 @@ class TupleBinHeap:
 		self.percDown(1)
 		return retval
 
+
+class IndexedBinHeap:
+	"""
+	Array-backed binary heap indexed by state key. Each key is on the heap at most once: inserting a key that is already
+	there only replaces the entry (decrease-key) when the new g is better than the best g seen so far for that key.
+	Ties on the priority are broken on h (smaller first) and then on insertion order, so the pop order is deterministic.
+	Entries are tuples (priority, h, order, key, item).
+	"""
+	def __init__(self):
+		self.heapList = [None]
+		self.currentSize = 0
+		self.position = dict() # keys = state keys, values = index of the entry in heapList
+		self.bestG = dict() # keys = state keys, values = best g ever inserted for that key
+		self.counter = 0
+
+	def swap(self,i,j):
+		self.heapList[i], self.heapList[j] = self.heapList[j], self.heapList[i]
+		self.position[self.heapList[i][3]] = i
+		self.position[self.heapList[j][3]] = j
+
+	def percUp(self,i):
+		while i // 2 > 0:
+			if self.heapList[i] < self.heapList[i // 2]:
+				self.swap(i, i // 2)
+			else:
+				break
+			i = i // 2
+
+	def percDown(self,i):
+		while (i * 2) <= self.currentSize:
+			mc = self.minChild(i)
+			if self.heapList[i] > self.heapList[mc]:
+				self.swap(i, mc)
+			else:
+				break
+			i = mc
+
+	def minChild(self,i):
+		if i * 2 + 1 > self.currentSize:
+			return i * 2
+		else:
+			if self.heapList[i*2] < self.heapList[i*2+1]:
+				return i * 2
+			else:
+				return i * 2 + 1
+
+	def improves(self,key,g):
+		"""
+		Returns whether an item with this key and g would be kept by insert, so that callers can skip building items that would be discarded
+		"""
+		best = self.bestG.get(key)
+		return best is None or g < best
+
+	def insert(self,k,key=None,g=None,h=0):
+		"""
+		k is a tuple (item, priority), as in TupleBinHeap. Returns False if the item was discarded because its key already
+		had an equal or better g.
+		"""
+		item, priority = k
+		if key is None:
+			key = item.__key__()
+		if g is None:
+			g = priority
+		best = self.bestG.get(key)
+		if best is not None and best <= g:
+			return False
+		self.bestG[key] = g
+		entry = (priority, h, self.counter, key, item)
+		self.counter = self.counter + 1
+		i = self.position.get(key)
+		if i is None:
+			self.heapList.append(entry)
+			self.currentSize = self.currentSize + 1
+			self.position[key] = self.currentSize
+			self.percUp(self.currentSize)
+		else:
+			self.heapList[i] = entry
+			self.percUp(i)
+			self.percDown(self.position[key])
+		return True
+
+	def top(self):
+		return (self.heapList[1][4], self.heapList[1][0])
+
+	def pop(self):
+		retval = self.heapList[1]
+		del self.position[retval[3]]
+		last = self.heapList.pop()
+		self.currentSize = self.currentSize - 1
+		if self.currentSize > 0:
+			self.heapList[1] = last
+			self.position[last[3]] = 1
+			self.percDown(1)
+		return (retval[4], retval[0])
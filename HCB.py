@@ -1,5 +1,42 @@
 from search import *
-import sys
+from shortestpaths import ShortestPaths, INFINITY
+from functools import partial
+import hashlib
+import math
+import os
+import pickle
+import time
+
+MASK64 = (1 << 64) - 1
+EPSILON = 1e-9 # tolerance of the comparisons between sums of edge costs, which may have been added in different orders
+
+def splitmix64(x):
+        """
+        Mixes a 64 bit integer. Used to derive the Zobrist values, so that they are the same in every process that loads the same HCB
+        """
+        x = (x + 0x9E3779B97F4A7C15) & MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+        return x ^ (x >> 31)
+
+# tags of the three kinds of Zobrist values: a cask in a given slot of a given stack, the CTS position and the cask on the CTS
+ZOBRIST_SLOT = 0
+ZOBRIST_POS = 1
+ZOBRIST_CTS = 2
+
+# version of the compiled cache format, and the Yard fields it stores
+CACHE_VERSION = 1
+CACHED_FIELDS = ('caskIds', 'caskLength', 'caskWeight', 'nodeIds', 'isStack', 'stackSize', 'adjacency', 'stackIds', 'caskStack', 'initialStacks')
+
+class StateKey(tuple):
+        """
+        Key of a HCB state: (hash, stacks, CTS_pos, cask_on_CTS). Hashing it returns the Zobrist hash stored in its first field instead of hashing
+        the whole nested tuple, so set and dict lookups on keys are O(1). Equality is plain tuple equality, which compares the hashes first.
+        """
+        __slots__ = ()
+
+        def __hash__(self):
+                return self[0]
 
 class Node:
         """
@@ -35,174 +72,562 @@ class Cask:
                 self.id = id
                 self.weight = weight
                 self.length = length
-class HCB:
+class ParentView:
+        """
+        Stands for the parent of a state that was rebuilt by HCBStateRepresentation.unpack. It holds the fields of the parent that the state reads.
+        """
+        __slots__ = ('CTS_pos', 'cask_on_CTS', 'cost')
+
+        def __init__(self, CTS_pos, cask_on_CTS, cost):
+                self.CTS_pos = CTS_pos
+                self.cask_on_CTS = cask_on_CTS
+                self.cost = cost
+
+class GoalCaskError(ValueError):
         """
-        Defines the static part of the problem -> The HCB graph and the data structures where information about the casks and nodes is stored.
-        In the State Representation, we use the objects' ids to access this class' structures and fetch their info when we need it (e.g. getting a cask's weight)
+        Raised when the goal cask isn't in any of the stacks of the yard
         """
-        def __init__(self, filename, goalCask, runDijkstra):
+        pass
+
+class Yard:
+        """
+        The part of the problem that doesn't depend on the goal cask -> The HCB graph and the data structures where information about the casks and nodes
+        is stored. A Yard can be shared by the HCB problems of several goal casks, so the file is only read, and the shortest paths only computed, once.
+        With cache set, the yard is also kept in a compiled cache file next to the source (see cachePath), which later runs load instead of parsing.
+        """
+        def __init__(self, filename, cache=False):
+                self.filename = filename
+                self.paths = None
+                start = time.perf_counter()
+                if not (cache and self.loadCache()):
+                        self.parse(filename)
+                        if cache:
+                                self.saveCache()
+                self.loadTime = time.perf_counter() - start # seconds spent reading the file or its compiled cache
+
+        def parse(self, filename):
                 """
-                Initialization of the problem. Here we read the file and store its information in the appropriate structures. We also create the
-                State representation of the initial state.
+                Here we read the file and store its information in the appropriate structures. The file is read in a single pass, line by line; the stacks
+                are only filled once every cask is known, since a stack line may come before the lines of its casks.
                 """
-                self.casks = dict()
-                self.nodes = dict()
-                self.nodes['EXIT'] = Exit()
-                self.paths = dict()
-                self.goalCask = goalCask
-                self.goalStack = None
-                stacks = []
-                lines = []
+                self._casks = dict()
+                self._nodes = dict()
+                self._nodes['EXIT'] = Exit()
+                self.caskStack = dict() # keys = cask ids, values = id of the stack where the cask is
+                self.stackIds = [] # in file order
+                stack_casks = []
                 try:
-                        with open(filename, "r") as f:
-                                lines = f.readlines()
+                        f = open(filename, "r")
                 except:
-                        raise IOError
-                
-                cask_lines = []
-                stack_lines = []
-                edge_lines = []
-                for line in lines:
-                        l = line.replace('\n', '').split(" ")
-                        if l == '':
+                        raise IOError("could not read {}".format(filename))
+                with f:
+                        for line in f:
+                                l = line.split()
+                                if not l:
+                                        continue
+                                if l[0][0] == 'C': # Creation of the casks. Each cask is stored in a dictionary, where its key is its id.
+                                        self._casks[l[0]] = Cask(l[0], float(l[2]), int(l[1]))
+                                elif l[0][0] == 'S': #Creation of the stacks. Here we instatiate the stacks and we also keep their casks for the initial state's "stacks" field
+                                        stack = Stack(l[0], int(l[1]))
+                                        if l[0] in self._nodes: # an edge line already mentioned this stack
+                                                stack.neighbours = self._nodes[l[0]].neighbours
+                                        self._nodes[l[0]] = stack
+                                        self.stackIds.append(l[0])
+                                        stack_casks.append(l[2:])
+                                        for cask in l[2:]:
+                                                self.caskStack[cask] = l[0]
+                                elif l[0][0] == 'E':
+                                        if not l[1] in self._nodes:
+                                                self._nodes[l[1]] = Node(l[1])
+                                        if not l[2] in self._nodes:
+                                                self._nodes[l[2]] = Node(l[2])
+
+                                        self._nodes[l[1]].neighbours[l[2]] = float(l[3]) # add node with id = l[2] to neighbour list of node with id = l[1]
+                                        self._nodes[l[2]].neighbours[l[1]] = float(l[3]) # vice versa
+
+                self.intern()
+                self.index()
+                self.initialStacks = self.blocks([tuple([self.stackSize[self.nodeIndex[stack_id]] - sum(self.caskLength[self.caskIndex[c]] for c in casks)] + [self.caskIndex[c] for c in casks])
+                                                  for (stack_id, casks) in zip(self.stackIds, stack_casks)])
+
+        @property
+        def casks(self):
+                """
+                Cask objects by id. They aren't stored in the compiled cache, so after loading one they're only rebuilt if asked for
+                """
+                if self._casks is None:
+                        self._casks = dict((cask_id, Cask(cask_id, self.caskWeight[i], self.caskLength[i])) for (i, cask_id) in enumerate(self.caskIds))
+                return self._casks
+
+        @property
+        def nodes(self):
+                """
+                Node objects by id. They aren't stored in the compiled cache, so after loading one they're only rebuilt if asked for
+                """
+                if self._nodes is None:
+                        self._nodes = dict()
+                        for (i, node_id) in enumerate(self.nodeIds):
+                                if node_id == 'EXIT':
+                                        node = Exit()
+                                elif self.isStack[i]:
+                                        node = Stack(node_id, self.stackSize[i])
+                                else:
+                                        node = Node(node_id)
+                                node.neighbours = dict((self.nodeIds[n], cost) for (n, cost) in self.adjacency[i])
+                                self._nodes[node_id] = node
+                return self._nodes
+
+        def computeAllPairs(self, method='auto'):
+                """
+                Fills self.paths with the full table of shortest path costs ('auto', 'floyd' or 'dijkstra', see ShortestPaths.allPairs)
+                """
+                if self.paths is None:
+                        self.paths = self.distances.allPairs(method)
+                return self.paths
+
+        def updateEdge(self, a, b, cost):
+                """
+                Sets the cost of the edge between the nodes with ids a and b, adding the edge if there's none. The shortest path tables that were already
+                computed, and self.paths, are repaired in place instead of being computed again, so the HCB problems created from this yard, which share
+                them, see the new cost too. Returns the previous cost of the edge
+                """
+                if a not in self.nodeIndex or b not in self.nodeIndex:
+                        raise ValueError("unknown node: {}".format(a if a not in self.nodeIndex else b))
+                (i, j) = (self.nodeIndex[a], self.nodeIndex[b])
+                old = self.distances.updateEdge(i, j, float(cost))
+                if self.paths is not None:
+                        self.distances.repairMatrix(self.paths, i, j, old, float(cost))
+                self.routes.clear()
+                if self._nodes is not None:
+                        self._nodes[a].neighbours[b] = float(cost)
+                        self._nodes[b].neighbours[a] = float(cost)
+                return old
+
+        def replaceInitialStack(self, stack_id, stack):
+                stacks = [stack_tuple for block in self.initialStacks for stack_tuple in block]
+                stacks[self.stackAt[self.nodeIndex[stack_id]][0]] = stack
+                self.initialStacks = self.blocks(stacks)
+
+        def addCask(self, cask_id, length, weight, stack_id):
+                """
+                Puts a new cask on top of a stack. The HCB problems created before the change still see the old initial state
+                """
+                if cask_id in self.caskStack:
+                        raise ValueError("cask {} is already in stack {}".format(cask_id, self.caskStack[cask_id]))
+                if stack_id not in self.nodeIndex or not self.isStack[self.nodeIndex[stack_id]]:
+                        raise ValueError("unknown stack: {}".format(stack_id))
+                (i, b, o) = self.stackAt[self.nodeIndex[stack_id]]
+                stack = self.initialStacks[b][o]
+                if stack[0] < length:
+                        raise ValueError("cask {} doesn't fit in stack {}".format(cask_id, stack_id))
+                if cask_id in self.caskIndex: # a cask that was removed before keeps its index
+                        cask = self.caskIndex[cask_id]
+                        self.caskLength[cask] = int(length)
+                        self.caskWeight[cask] = float(weight)
+                        self.handlingCost[cask] = 1 + float(weight)
+                else:
+                        cask = len(self.caskIds)
+                        self.caskIds.append(cask_id)
+                        self.caskLength.append(int(length))
+                        self.caskWeight.append(float(weight))
+                        self.handlingCost.append(1 + float(weight))
+                        self.caskIndex[cask_id] = cask
+                self.replaceInitialStack(stack_id, (stack[0] - int(length),) + stack[1:] + (cask,))
+                self.caskStack[cask_id] = stack_id
+                if self._casks is not None:
+                        self._casks[cask_id] = Cask(cask_id, float(weight), int(length))
+
+        def removeCask(self, cask_id):
+                """
+                Takes a cask out of its stack, wherever it is in the stack. The HCB problems created before the change still see the old initial state
+                """
+                if cask_id not in self.caskStack:
+                        raise ValueError("cask {} isn't in any of the stacks".format(cask_id))
+                stack_id = self.caskStack.pop(cask_id)
+                cask = self.caskIndex[cask_id]
+                (i, b, o) = self.stackAt[self.nodeIndex[stack_id]]
+                stack = self.initialStacks[b][o]
+                self.replaceInitialStack(stack_id, (stack[0] + self.caskLength[cask],) + tuple(c for c in stack[1:] if c != cask))
+                if self._casks is not None:
+                        del self._casks[cask_id]
+
+        def intern(self):
+                """
+                Maps casks and nodes to small integers, which is what the State Representation stores. The lists below are indexed by those integers
+                and the ids are only used again when printing the solution.
+                """
+                self.caskIds = list(self.casks)
+                self.caskLength = [self.casks[cask_id].length for cask_id in self.caskIds]
+                self.caskWeight = [self.casks[cask_id].weight for cask_id in self.caskIds]
+
+                self.nodeIds = list(self.nodes)
+                node_index = dict((node_id, i) for (i, node_id) in enumerate(self.nodeIds))
+                self.isStack = [type(self.nodes[node_id]) == Stack for node_id in self.nodeIds]
+                self.stackSize = [self.nodes[node_id].size if self.isStack[i] else 0 for (i, node_id) in enumerate(self.nodeIds)]
+                self.adjacency = [tuple((node_index[n], cost) for (n, cost) in self.nodes[node_id].neighbours.items()) for node_id in self.nodeIds] # same order as Node.neighbours
+
+        def index(self, tables=None):
+                """
+                Builds the structures derived from the interned lists, which aren't stored in the compiled cache. tables are the single-source shortest path
+                tables that were already computed
+                """
+                self.caskIndex = dict(zip(self.caskIds, range(0, len(self.caskIds))))
+                self.nodeIndex = dict(zip(self.nodeIds, range(0, len(self.nodeIds))))
+                self.exit = self.nodeIndex['EXIT']
+                self.handlingCost = [1 + weight for weight in self.caskWeight] # cost of loading or unloading each cask, also the factor of the cost of moving with it
+                self.distances = ShortestPaths(self.adjacency) # computed lazily, only the tables that are asked for
+                if tables:
+                        self.distances.tables.update(tables)
+                self.zobristTable = dict()
+                self.routes = dict() # keys = (from, to) node pairs, values = their shortest path as returned by route
+
+                # stack-position index: for each node, None if it isn't a stack, otherwise (position of the stack in the file, block, offset in the block).
+                # The stacks of a state are split in blocks of about sqrt(#stacks) stacks, so an operation on a stack only copies its block and the
+                # outer tuple of blocks, and shares every other block with the parent state
+                self.blockSize = max(1, int(math.ceil(math.sqrt(len(self.stackIds)))))
+                self.stackAt = [None] * len(self.nodeIds)
+                self.stackNodes = [self.nodeIndex[stack_id] for stack_id in self.stackIds]
+                for (i, stack_id) in enumerate(self.stackIds):
+                        self.stackAt[self.nodeIndex[stack_id]] = (i, i // self.blockSize, i % self.blockSize)
+
+        def cachePath(self):
+                return self.filename + ".hcbc"
+
+        def sourceHeader(self, digest=None):
+                """
+                Header that ties a compiled cache to its source file: (format version, mtime, size, sha1 of the contents). The sha1 is only computed when
+                digest is set; otherwise it is None
+                """
+                st = os.stat(self.filename)
+                sha1 = None
+                if digest:
+                        h = hashlib.sha1()
+                        with open(self.filename, "rb") as f:
+                                for chunk in iter(lambda: f.read(1 << 20), b""):
+                                        h.update(chunk)
+                        sha1 = h.hexdigest()
+                return (CACHE_VERSION, st.st_mtime_ns, st.st_size, sha1)
+
+        def saveCache(self):
+                """
+                Writes the compiled cache: the header, then the interned lists, the initial stacks and the shortest path tables computed so far.
+                Failing to write it isn't an error, the yard just won't be cached
+                """
+                data = dict((name, getattr(self, name)) for name in CACHED_FIELDS)
+                data['tables'] = self.distances.tables
+                path = self.cachePath()
+                try:
+                        with open(path + ".tmp", "wb") as f:
+                                pickle.dump(self.sourceHeader(True), f, pickle.HIGHEST_PROTOCOL)
+                                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+                        os.replace(path + ".tmp", path)
+                except (IOError, OSError):
+                        pass
+                self.cachedTables = len(self.distances.tables)
+
+        def updateCache(self):
+                """
+                Rewrites the compiled cache if shortest path tables were computed since it was written or loaded
+                """
+                if len(self.distances.tables) != getattr(self, 'cachedTables', len(self.distances.tables)):
+                        self.saveCache()
+
+        def loadCache(self):
+                """
+                Loads the compiled cache if there is one for the current contents of the source file. It is accepted right away if the source's mtime and
+                size match the header, and otherwise only if the sha1 of the source does. Returns False when the file has to be parsed instead
+                """
+                try:
+                        with open(self.cachePath(), "rb") as f:
+                                header = pickle.load(f)
+                                current = self.sourceHeader()
+                                if header[:3] != current[:3]:
+                                        if header[0] != CACHE_VERSION or header[2] != current[2] or header[3] != self.sourceHeader(True)[3]:
+                                                return False
+                                data = pickle.load(f)
+                except Exception:
+                        return False
+                for name in CACHED_FIELDS:
+                        setattr(self, name, data[name])
+                self._casks = None
+                self._nodes = None
+                self.index(data['tables'])
+                self.cachedTables = len(data['tables'])
+                return True
+
+        def route(self, a, b):
+                """
+                Returns the shortest path from node a to node b as (nodes, edges), where nodes are the nodes after a, in order, and edges the costs of the
+                edges that lead to each of them; or None if b can't be reached from a. Used by the macro moves, which go straight between stacks and EXIT
+                """
+                path = self.routes.get((a, b), False)
+                if path is False:
+                        (costs, prev) = self.distances.fromSource(b)
+                        path = None
+                        if costs[a] != INFINITY:
+                                nodes = []
+                                edges = []
+                                node = a
+                                while node != b: # the tree of shortest paths from b gives the next node towards b
+                                        step = prev[node]
+                                        edges.append(min(edge for (neighbour, edge) in self.adjacency[node] if neighbour == step))
+                                        nodes.append(step)
+                                        node = step
+                                path = (tuple(nodes), tuple(edges))
+                        self.routes[(a, b)] = path
+                return path
+
+        def blocks(self, stacks):
+                """
+                Splits a list of stack tuples, in file order, in the blocks used by the State Representation
+                """
+                return tuple(tuple(stacks[i:i + self.blockSize]) for i in range(0, len(stacks), self.blockSize))
+
+        def zobrist(self, *k):
+                """
+                Zobrist value of a state component. k is (ZOBRIST_SLOT, stack, slot, cask), (ZOBRIST_POS, node) or (ZOBRIST_CTS, cask).
+                The hash of a state is the xor of the values of its components, so operations update it by xoring out the old components and xoring in the new ones
+                """
+                z = self.zobristTable.get(k)
+                if z is None:
+                        z = 0
+                        for v in k:
+                                z = splitmix64(z ^ v)
+                        self.zobristTable[k] = z
+                return z
+
+        def stateHash(self, stacks, CTS_pos, cask_on_CTS):
+                """
+                Computes the hash of a state from scratch. Only used for the initial state; every other state gets its hash updated by the operation that created it
+                """
+                h = self.zobrist(ZOBRIST_POS, CTS_pos)
+                if cask_on_CTS != None:
+                        h ^= self.zobrist(ZOBRIST_CTS, cask_on_CTS)
+                for (b, block) in enumerate(stacks):
+                        for (o, stack) in enumerate(block):
+                                for slot in range(1, len(stack)):
+                                        h ^= self.zobrist(ZOBRIST_SLOT, b * self.blockSize + o, slot, stack[slot])
+                return h
+
+class HCB(Yard):
+        """
+        Defines the static part of the problem -> The yard, the goal cask and the initial state.
+        In the State Representation, we use the objects' indices to access this class' structures and fetch their info when we need it (e.g. getting a cask's weight)
+        """
+        def __init__(self, filename, goalCask, runDijkstra, allPairs=False, heuristic='distance', macro=False, prune=False):
+                """
+                Initialization of the problem. filename is either the name of the file to read or a Yard that was already read, whose structures are shared
+                with this problem. We also create the State representation of the initial state.
+                The shortest paths used by the heuristic are computed lazily, on the first call to the heuristic, so runDijkstra is only kept for compatibility.
+                allPairs additionally computes the full table of shortest path costs in self.paths ('auto', 'floyd' or 'dijkstra', see ShortestPaths.allPairs).
+                heuristic is the name of the heuristic the states use (a key of the heuristics dict at the end of this module).
+                With macro set, the CTS doesn't stop at the plain nodes of the graph: it moves straight between stacks and EXIT, along shortest paths, and
+                each of these macro moves is printed as the moves on the edges of its path.
+                With prune set, the states don't generate the operations that the analysis of analyseRelevance shows can't be part of an optimal
+                solution (see HCBStateRepresentation.successors).
+                Raises GoalCaskError if the goal cask isn't in any of the stacks.
+                """
+                if heuristic not in heuristics:
+                        raise ValueError("unknown heuristic: {}".format(heuristic))
+                yard = filename if isinstance(filename, Yard) else Yard(filename)
+                if allPairs:
+                        yard.computeAllPairs('auto' if allPairs == True else allPairs)
+                self.__dict__.update(yard.__dict__) # the yard's structures are shared, not copied
+                self.yard = yard
+
+                if goalCask not in self.caskStack:
+                        raise GoalCaskError("Goal cask isn't in any of the stacks.")
+                self.heuristicFunction = heuristics[heuristic]
+                self.macro = macro
+                self.goalCask = goalCask
+                self.goalStack = self.caskStack[goalCask]
+                self.goal = self.caskIndex[goalCask]
+                self.goalStackIndex = self.nodeIndex[self.goalStack]
+                self.blockingCache = dict() # keys = tuples of the goal stack, values = the part of HCBStateRepresentation.blockingHeuristic that only depends on them
+                self.prune = prune
+                if prune:
+                        self.analyseRelevance()
+                self.initial_state = HCBStateRepresentation(None, self, 0, self.initialStacks, self.exit, None, '')
+                self.dijkstraStart = self.distances.time
+
+        def analyseRelevance(self):
+                """
+                Finds, before the search, what the goal can depend on. The relevance pruning only drops operations that the following shows to be useless:
+                        -> the casks that may have to be moved are the ones above the goal cask, and the casks of the host stacks. A host stack is a stack,
+                           other than the one of the goal cask, that can hold one of these casks when it's empty, so that removing its own casks may make
+                           room for them. The hosts and the casks are computed together, until neither grows. Loading a cask from any other stack only
+                           adds costs: the casks that have to be moved never fit in it
+                        -> the dead nodes: the junctions that are left after removing, again and again, the junctions (neither stacks nor the EXIT) with a
+                           single neighbour. The CTS has nothing to do in them and can only leave them the way it came in
+                        -> the leaf stacks: stacks with a single neighbour that isn't dead. Going into one is only useful if the CTS can load or unload there
+                        -> the twins of each stack: stacks with the same size and the same neighbours, at the same costs, which come before it in
+                           self.stackNodes. Swapping two empty twins doesn't change the problem, so a cask is only unloaded on an empty stack when its
+                           twins that come first aren't empty
+                Besides, the goal cask is never unloaded, and once it's on the CTS, or has no cask above it while the CTS is empty, the CTS only moves
+                along shortest paths to the EXIT, or to the goal cask.
+                """
+                (i, b, o) = self.stackAt[self.goalStackIndex]
+                stack = self.initialStacks[b][o]
+                relevant = set(stack[stack.index(self.goal, 1) + 1:]) # casks that may have to be moved
+                self.hostStacks = set()
+                grown = True
+                while grown and relevant:
+                        grown = False
+                        shortest = min(self.caskLength[cask] for cask in relevant)
+                        for node in self.stackNodes:
+                                if node != self.goalStackIndex and node not in self.hostStacks and self.stackSize[node] >= shortest:
+                                        self.hostStacks.add(node)
+                                        (i, b, o) = self.stackAt[node]
+                                        relevant.update(self.initialStacks[b][o][1:])
+                                        grown = True
+                self.relevantCasks = relevant
+
+                degree = [len(neighbours) for neighbours in self.adjacency]
+                self.deadNodes = set()
+                leaves = [node for node in range(0, len(self.adjacency)) if degree[node] <= 1]
+                while leaves:
+                        node = leaves.pop()
+                        if node in self.deadNodes or self.isStack[node] or node == self.exit:
                                 continue
-                        if l[0][0] == 'C':
-                                cask_lines.append(l)
-                        elif l[0][0] == 'S':
-                                stack_lines.append(l)
-                        elif l[0][0] == 'E':
-                                edge_lines.append(l)
-
-
-
-                for l in cask_lines: # Creation of the casks. Each cask is stored in a dictionary, where its key is its id.
-                        cask_id = l[0]
-                        cask_length = int(l[1])
-                        cask_weight = float(l[2])
-                        self.casks[cask_id] = Cask(cask_id, cask_weight, cask_length)
-
-                for l in stack_lines: #Creation of the stacks. Here we instatiate the stacks and we also initialize the initial state's "stacks" field
-                        stack_id = l[0]
-                        stack_size = int(l[1])
-                        self.nodes[stack_id] = Stack(stack_id, stack_size)
-                        casks = l[2:]
-                        if goalCask in casks:
-                                self.goalStack = stack_id
-
-                        space_left = stack_size
-                        for cask in casks:
-                                space_left -= self.casks[cask].length
-                        stacks.append((stack_id, space_left, tuple(casks)))
-
-                for l in edge_lines:
-                        if not l[1] in self.nodes:
-                                if l[1] != 'EXIT':
-                                        self.nodes[l[1]] = Node(l[1])
-                        if not l[2] in self.nodes:
-                                if l[2] != 'EXIT':
-                                        self.nodes[l[2]] = Node(l[2])
-
-                        self.nodes[l[1]].neighbours[l[2]] = float(l[3]) # add node with id = l[2] to neighbour list of node with id = l[1]
-                        self.nodes[l[2]].neighbours[l[1]] = float(l[3]) # vice versa
-
-                valid = False
-                for stack in stacks:
-                    if goalCask in stack[2]:
-                        valid = True
-                        break
-                if not valid:
-                    print("Goal cask isn't in any of the stacks. Exiting.")
-                    sys.exit(0)
-
-                if runDijkstra: # we only need this if we're using an informed search algorithm
-                        for node in self.nodes.values(): # we run dijkstra's algorithm to compute the shortest path between nodes. This is used in our heuristic
-                                self.paths[node.id] = dijkstra(self.nodes.values(), node)
-
-                self.initial_state = HCBStateRepresentation(None, self, 0, tuple(stacks), 'EXIT', None, '')
+                        self.deadNodes.add(node)
+                        for (neighbour, edge) in self.adjacency[node]:
+                                degree[neighbour] -= 1
+                                if degree[neighbour] <= 1:
+                                        leaves.append(neighbour)
+                self.leafStacks = set(node for node in self.stackNodes
+                                      if len([neighbour for (neighbour, edge) in self.adjacency[node] if neighbour not in self.deadNodes]) <= 1)
+
+                self.twins = dict() # keys = stack nodes, values = tuple of the twins that come before them
+                groups = dict()
+                for node in self.stackNodes:
+                        if node != self.goalStackIndex:
+                                group = groups.setdefault((self.stackSize[node], tuple(sorted(self.adjacency[node]))), [])
+                                if group:
+                                        self.twins[node] = tuple(group)
+                                group.append(node)
+
+        def computeAllPairs(self, method='auto'):
+                """
+                Fills the paths of the yard, which every problem of the yard shares, so that Yard.updateEdge repairs the same table
+                """
+                self.paths = self.yard.computeAllPairs(method)
+                return self.paths
+
+        def recordTimes(self, stats):
+                """
+                Adds the time spent reading the yard and computing shortest paths to the stats of a search on this problem. The shortest paths are computed
+                lazily, during the search, so the time spent on them since this problem was created is taken out of the search time
+                """
+                during_search = self.distances.time - self.dijkstraStart
+                stats.time['parse'] = self.yard.loadTime
+                stats.time['dijkstra'] = self.distances.time
+                stats.time['search'] = max(0.0, stats.time['search'] - during_search)
 
 class HCBStateRepresentation(StateRepresentation):
         """
         Class for the representation of States on the search algorithm. This class extends the 'interface' StateRepresentation.
+        Casks and nodes are represented by the integers they were interned to in Yard.intern, and the hash of the state is a Zobrist hash that
+        each operation updates incrementally.
         """
-        def __init__(self, parent, hcb, cost, stacks, CTS_pos, cask_on_CTS, prev_operation):
-                self.stacks = stacks # tuple of stack tuples. each stack tuple -> (stack_id, space_left, (Cx,Cy,Cz,...))
+        __slots__ = ('stacks', 'CTS_pos', 'cask_on_CTS', 'cost', 'prev_operation', 'hcb', 'hash')
+
+        def __init__(self, parent, hcb, cost, stacks, CTS_pos, cask_on_CTS, prev_operation, hash=None):
+                self.stacks = stacks # tuple of blocks of stack tuples (see HCB.stackAt). each stack tuple -> (space_left, Cx, Cy, Cz, ...), with the top of the stack last
                 self.parent = parent # node through each we got here
-                self.CTS_pos = CTS_pos # position of the CTS. this is an Id, so we need to use it to index the dict in self.hcb.nodes
-                self.cask_on_CTS = cask_on_CTS # cask loaded on CTS. (None -> no cask). This is an Id, so we need to use it to index the dict in self.hcb.casks
+                self.CTS_pos = CTS_pos # position of the CTS. this is a node index, so we need to use it to index the lists in self.hcb
+                self.cask_on_CTS = cask_on_CTS # cask loaded on CTS. (None -> no cask). This is a cask index, so we need to use it to index the lists in self.hcb
                 self.cost = cost
                 self.prev_operation = prev_operation # operation that got us here
                 self.hcb = hcb
+                if hash == None:
+                        hash = hcb.stateHash(stacks, CTS_pos, cask_on_CTS)
+                self.hash = hash
 
         def __key__(self):
-                return (self.stacks, self.CTS_pos, self.cask_on_CTS) # fields that define the state. two states are equivalent if this function returns the same for both
+                return StateKey((self.hash, self.stacks, self.CTS_pos, self.cask_on_CTS)) # fields that define the state. two states are equivalent if this function returns the same for both
 
         def __hash__(self):
-                return hash(self.__key__())
+                return self.hash
 
         def __eq__(self, other):
-                return self.__hash__() == other.__hash__()
+                return isinstance(other, HCBStateRepresentation) and self.__key__() == other.__key__()
+
+        def pack(self):
+                parent = None
+                if self.parent is not None:
+                        parent = (self.parent.CTS_pos, self.parent.cask_on_CTS, self.parent.cost)
+                return (self.stacks, self.CTS_pos, self.cask_on_CTS, self.cost, self.prev_operation, self.hash, parent)
+
+        def unpack(self, packed):
+                (stacks, CTS_pos, cask_on_CTS, cost, prev_operation, hash, parent) = packed
+                if parent != None:
+                        parent = ParentView(*parent)
+                return HCBStateRepresentation(parent, self.hcb, cost, stacks, CTS_pos, cask_on_CTS, prev_operation, hash)
+
+        def operationCode(self):
+                return self.prev_operation or 0 # the initial state has no operation ('')
+
+        def rebuild(self, key, cost, operation, parent):
+                return HCBStateRepresentation(parent, self.hcb, cost, key[1], key[2], key[3], operation, key[0])
 
         def checksol(self): # method to check whether this state is a solution
-                return self.cask_on_CTS == self.hcb.goalCask and self.CTS_pos == self.hcb.nodes['EXIT'].id
+                return self.cask_on_CTS == self.hcb.goal and self.CTS_pos == self.hcb.exit
 
-        def doUnload(self, stack_id, cask_id):
+        def getStack(self, node=None):
                 """
-                Handle the manipulation of the stacks data structure upon the unloading of a cask
+                Returns the stack tuple of the stack at the given node, by default the one where the CTS is
                 """
-                _stacks = list(self.stacks)
+                (i, b, o) = self.hcb.stackAt[self.CTS_pos if node == None else node]
+                return self.stacks[b][o]
 
-                for i in range(0,len(_stacks)):
-                        if _stacks[i][0] == stack_id:
-                                space_left = _stacks[i][1] - self.hcb.casks[cask_id].length
-                                if len(_stacks[i][2]) > 0:
-                                        casks = list(_stacks[i][2])
-                                        casks.append(cask_id)
-                                        _stacks[i] = (stack_id, space_left, tuple(casks))
-                                else:
-                                        _stacks[i] = (stack_id, space_left, tuple([cask_id]))
-                                break
+        def replaceStack(self, b, o, stack):
+                """
+                Returns a copy of self.stacks where the stack at offset o of block b is replaced. Every other block is shared with this state
+                """
+                block = self.stacks[b]
+                return self.stacks[:b] + (block[:o] + (stack,) + block[o + 1:],) + self.stacks[b + 1:]
 
-                return tuple(_stacks)
+        def doUnload(self, stack_id, cask_id):
+                """
+                Handle the manipulation of the stacks data structure upon the unloading of a cask. Returns the new stacks and the hash of the new state
+                """
+                (i, b, o) = self.hcb.stackAt[stack_id]
+                stack = self.stacks[b][o]
+                hash = self.hash ^ self.hcb.zobrist(ZOBRIST_CTS, cask_id) ^ self.hcb.zobrist(ZOBRIST_SLOT, i, len(stack), cask_id)
+                stack = (stack[0] - self.hcb.caskLength[cask_id],) + stack[1:] + (cask_id,)
+                return self.replaceStack(b, o, stack), hash
 
 
         def doLoad(self, stack_id):
                 """
-                Handle the manipulation of the stacks data structure upon the loading of a cask.
+                Handle the manipulation of the stacks data structure upon the loading of a cask. Returns the new stacks, the loaded cask and the hash of the new state
                 """
-                _stacks = list(self.stacks)
-                for i in range(0, len(_stacks)):
-                        if _stacks[i][0] == stack_id:
-                                casks = list(_stacks[i][2])
-                                cask = casks.pop()
-                                space_left = _stacks[i][1] + self.hcb.casks[cask].length
-                                _stacks[i] = (stack_id, space_left, tuple(casks))
-                                break
-
-                return tuple(_stacks), cask
+                (i, b, o) = self.hcb.stackAt[stack_id]
+                stack = self.stacks[b][o]
+                cask = stack[-1]
+                hash = self.hash ^ self.hcb.zobrist(ZOBRIST_SLOT, i, len(stack) - 1, cask) ^ self.hcb.zobrist(ZOBRIST_CTS, cask)
+                stack = (stack[0] + self.hcb.caskLength[cask],) + stack[1:-1]
+                return self.replaceStack(b, o, stack), cask, hash
 
 
 # The names of the following group of methods are pretty self-explaining, but here are some remarks:
 #       -> The methods that check if a given operation is feasible have to check if this operation undoes the previous one, to avoid infinite loops
-#       -> self.CTS_pos and self.cask_on_CTS are Ids, so everytime we need info on the object they represent, we have to use these Ids to index the
-#       appropriate dicts on the HCB object
+#       -> self.CTS_pos and self.cask_on_CTS are indices, so everytime we need info on the object they represent, we have to use these indices to index the
+#       appropriate lists on the HCB object
 #       -> The methods that fetch operation costs are only called after their corresponding operations have been deemed feasible, so there are no
 #       feasibility checks inside them
 
         def unloadIsFeasible(self):
-                return type(self.hcb.nodes[self.CTS_pos]) == Stack and self.cask_on_CTS != None and self.prev_operation != ord("L")
+                return self.hcb.isStack[self.CTS_pos] and self.cask_on_CTS != None and self.prev_operation != ord("L")
 
         def caskFitsStack(self):
-                for stack in self.stacks:
-                        if stack[0] == self.CTS_pos:
-                                return stack[1] >= self.hcb.casks[self.cask_on_CTS].length
+                return self.getStack()[0] >= self.hcb.caskLength[self.cask_on_CTS]
 
         def loadIsFeasible(self):
-                return type(self.hcb.nodes[self.CTS_pos]) == Stack and self.cask_on_CTS == None and self.prev_operation != ord("U")
+                return self.hcb.isStack[self.CTS_pos] and self.cask_on_CTS == None and self.prev_operation != ord("U")
 
         def stackHasCasks(self):
-                for stack in self.stacks:
-                        if stack[0] == self.CTS_pos:
-                                return stack[1] < self.hcb.nodes[self.CTS_pos].size
+                return len(self.getStack()) > 1
 
         def moveIsFeasible(self, neighbour):
                 if self.prev_operation != ord('M'):
@@ -211,20 +636,70 @@ class HCBStateRepresentation(StateRepresentation):
                         return True
                 return False 
 
+        def macroMoveTargets(self):
+                # two moves in a row are never better than the one straight move, so there's no macro move after a move. The CTS only goes where it can do
+                # something: the EXIT with the goal cask, a stack with room for the cask it carries, or a stack with casks to load
+                hcb = self.hcb
+                if self.prev_operation == ord('M'):
+                        return []
+                if self.cask_on_CTS == hcb.goal:
+                        return [hcb.exit] if self.CTS_pos != hcb.exit else []
+                if self.cask_on_CTS == None:
+                        targets = [node for node in hcb.stackNodes if node != self.CTS_pos and len(self.getStack(node)) > 1]
+                        return [node for node in targets if self.loadIsRelevant(node)] if hcb.prune else targets
+                length = hcb.caskLength[self.cask_on_CTS]
+                targets = [node for node in hcb.stackNodes if node != self.CTS_pos and self.getStack(node)[0] >= length]
+                return [node for node in targets if self.unloadIsRelevant(node)] if hcb.prune else targets
+
+        def goalIsFree(self):
+                return self.getStack(self.hcb.goalStackIndex)[-1] == self.hcb.goal # no cask left above the goal cask
+
+        def loadIsRelevant(self, node=None):
+                # loads from the stack of the goal cask, or from the host stacks while there are still casks above the goal cask (see HCB.analyseRelevance)
+                node = self.CTS_pos if node == None else node
+                return node == self.hcb.goalStackIndex or (node in self.hcb.hostStacks and not self.goalIsFree())
+
+        def unloadIsRelevant(self, node=None):
+                # the goal cask is never unloaded, and a cask is only unloaded on an empty stack if its twins that come first aren't empty
+                node = self.CTS_pos if node == None else node
+                if self.cask_on_CTS == self.hcb.goal:
+                        return False
+                if node in self.hcb.twins and len(self.getStack(node)) == 1:
+                        for twin in self.hcb.twins[node]:
+                                if len(self.getStack(twin)) == 1:
+                                        return False
+                return True
+
+        def moveIsRelevant(self, neighbour, edge):
+                # no move into dead nodes, nor into leaf stacks where the CTS can't do anything. Once the goal cask is on the CTS, or free with nothing on the
+                # CTS, what's left is to go to the EXIT, or to the stack of the goal cask, so the CTS only moves along shortest paths to it
+                hcb = self.hcb
+                if neighbour in hcb.deadNodes:
+                        return False
+                target = None
+                if self.cask_on_CTS == hcb.goal:
+                        target = hcb.exit
+                elif self.cask_on_CTS == None and self.goalIsFree():
+                        target = hcb.goalStackIndex
+                if target != None:
+                        distances = hcb.distances.distancesFrom(target)
+                        return distances[neighbour] + edge <= distances[self.CTS_pos] + EPSILON
+                if neighbour in hcb.leafStacks:
+                        if self.cask_on_CTS == None:
+                                return len(self.getStack(neighbour)) > 1 and self.loadIsRelevant(neighbour)
+                        return self.getStack(neighbour)[0] >= hcb.caskLength[self.cask_on_CTS] and self.unloadIsRelevant(neighbour)
+                return True
+
         def getCaskOnThisStack(self):
-                for stack in self.stacks:
-                        if stack[0] == self.CTS_pos:
-                                return stack[2][0]
+                return self.getStack()[-1] # the top of the stack is the last cask of the tuple (see doLoad)
 
         def getLoadCost(self, cask):
-                return 1 + self.hcb.casks[cask].weight
+                return 1 + self.hcb.caskWeight[cask]
 
         def getUnloadCost(self):
-                return 1 + self.hcb.casks[self.cask_on_CTS].weight
-
-        def getMoveCost(self, neighbour):
-                edge = self.hcb.nodes[self.CTS_pos].neighbours[neighbour]
+                return 1 + self.hcb.caskWeight[self.cask_on_CTS]
 
+        def getMoveCost(self, edge):
                 if self.cask_on_CTS == None:
                         cost = edge 
                 else:
@@ -235,97 +710,154 @@ class HCBStateRepresentation(StateRepresentation):
         def getMoveDescription(self):
                 cost = self.cost - self.parent.cost
                 if self.prev_operation == ord("M"):
-                        return "move {} {} {}".format(self.parent.CTS_pos, self.CTS_pos, cost)
+                        return "move {} {} {}".format(self.hcb.nodeIds[self.parent.CTS_pos], self.hcb.nodeIds[self.CTS_pos], cost)
                 elif self.prev_operation == ord("L"):
-                        return "load {} {} {}".format(self.cask_on_CTS, self.CTS_pos, cost)
+                        return "load {} {} {}".format(self.hcb.caskIds[self.cask_on_CTS], self.hcb.nodeIds[self.CTS_pos], cost)
                 elif self.prev_operation == ord("U"):
-                        return "unload {} {} {}".format(self.parent.cask_on_CTS, self.CTS_pos, cost)
+                        return "unload {} {} {}".format(self.hcb.caskIds[self.parent.cask_on_CTS], self.hcb.nodeIds[self.CTS_pos], cost)
+
+        def getMoveDescriptions(self):
+                """
+                A macro move is described by a move line for each edge of its path, with the costs the same moves have without macro moves
+                """
+                if not (self.hcb.macro and self.prev_operation == ord("M")):
+                        return [self.getMoveDescription()]
+                lines = []
+                cost = self.parent.cost
+                previous = self.parent.CTS_pos
+                for (node, edge) in zip(*self.hcb.route(previous, self.CTS_pos)):
+                        next_cost = self.getMoveCost(edge) + cost
+                        lines.append("move {} {} {}".format(self.hcb.nodeIds[previous], self.hcb.nodeIds[node], next_cost - cost))
+                        (previous, cost) = (node, next_cost)
+                return lines
 
 # ----------------------------------- END OF GROUP OF SELF-EXPLAINING METHODS ------------------------------------
 
 
 
 # The following group of methods implements the actual operations to be performed on this node. They're only ever called after they've been deemed feasible,
-# so there's no feasibility checks inside them. They each compute the appropriate arguments to instantiate the StateRepresentation of the node created by performing
-# that operation and then instantiate and return that node.
-        def move(self, to):
-                next_cost = self.getMoveCost(to) + self.cost
-                next_CTS_pos = to
-                next_stacks = tuple(self.stacks)
-                child = HCBStateRepresentation(self, self.hcb, next_cost, next_stacks, next_CTS_pos, self.cask_on_CTS, ord("M"))
-                return child
+# so there's no feasibility checks inside them. They each compute the cost and the key of the node created by performing that operation, and return them
+# with a function that instantiates that node, so that the search only builds the nodes it keeps (see StateRepresentation.successors).
+        def move(self, to, edge):
+                next_cost = self.getMoveCost(edge) + self.cost
+                next_hash = self.hash ^ self.hcb.zobrist(ZOBRIST_POS, self.CTS_pos) ^ self.hcb.zobrist(ZOBRIST_POS, to)
+                key = StateKey((next_hash, self.stacks, to, self.cask_on_CTS))
+                return (key, next_cost, partial(HCBStateRepresentation, self, self.hcb, next_cost, self.stacks, to, self.cask_on_CTS, ord("M"), next_hash))
+
+        def macroMove(self, to, edges):
+                next_cost = self.cost
+                for edge in edges: # adds the cost of each edge in turn, so that the cost is the same as the one of the moves on the path
+                        next_cost = self.getMoveCost(edge) + next_cost
+                next_hash = self.hash ^ self.hcb.zobrist(ZOBRIST_POS, self.CTS_pos) ^ self.hcb.zobrist(ZOBRIST_POS, to)
+                key = StateKey((next_hash, self.stacks, to, self.cask_on_CTS))
+                return (key, next_cost, partial(HCBStateRepresentation, self, self.hcb, next_cost, self.stacks, to, self.cask_on_CTS, ord("M"), next_hash))
 
         def unload(self):
                 next_cost = self.getUnloadCost() + self.cost
-                next_stacks = self.doUnload(self.CTS_pos, self.cask_on_CTS)
-                child = HCBStateRepresentation(self, self.hcb, next_cost, next_stacks, self.CTS_pos, None, ord("U"))
-                return child
+                next_stacks, next_hash = self.doUnload(self.CTS_pos, self.cask_on_CTS)
+                key = StateKey((next_hash, next_stacks, self.CTS_pos, None))
+                return (key, next_cost, partial(HCBStateRepresentation, self, self.hcb, next_cost, next_stacks, self.CTS_pos, None, ord("U"), next_hash))
 
         def load(self):
-                next_stacks, next_cask_on_CTS = self.doLoad(self.CTS_pos)
+                next_stacks, next_cask_on_CTS, next_hash = self.doLoad(self.CTS_pos)
                 next_cost = self.getLoadCost(next_cask_on_CTS) + self.cost
-                child = HCBStateRepresentation(self, self.hcb, next_cost, next_stacks, self.CTS_pos, next_cask_on_CTS, ord("L"))
-                return child
+                key = StateKey((next_hash, next_stacks, self.CTS_pos, next_cask_on_CTS))
+                return (key, next_cost, partial(HCBStateRepresentation, self, self.hcb, next_cost, next_stacks, self.CTS_pos, next_cask_on_CTS, ord("L"), next_hash))
 
 # ---------------------------------- END OF OPERATIONS IMPLEMENTATION ------------------------------------------------------
         def heuristic(self):
+                """
+                Returns the value of the heuristic selected when the HCB was created
+                """
+                return self.hcb.heuristicFunction(self)
+
+        def distanceHeuristic(self):
                 """
                 This method implements an heuristic to be used with a informed search algorithm. The heuristic is the following:
                         -> if there is a cask on the CTS and it is the goal cask, return the cost of moving from the CTS position to the EXIT node
                         -> if there's no cask on the CTS, or the cask on the CTS is not the goal cask, return the cost of moving to the stack
                            where the goal cask is + the cost of moving from that stack to the exit node
+                The goal cask is looked for in the other stacks when it was unloaded somewhere else, as in blockingHeuristic, so that the heuristic stays
+                admissible in those states.
                 """
-                if self.cask_on_CTS == self.hcb.goalCask:
-                        return self.hcb.paths[self.CTS_pos]['EXIT'][0]
-                else:
-                        return self.hcb.paths[self.CTS_pos][self.hcb.goalStack][0] + self.hcb.paths[self.hcb.goalStack]['EXIT'][0]
-
-        def expand(self):
+                to_exit = self.hcb.distances.distancesFrom(self.hcb.exit)
+                if self.cask_on_CTS == self.hcb.goal:
+                        return to_exit[self.CTS_pos]
+                goal_stack = self.hcb.goalStackIndex
+                if self.hcb.goal not in self.getStack(goal_stack)[1:]:
+                        for node in self.hcb.stackNodes:
+                                if self.hcb.goal in self.getStack(node)[1:]:
+                                        goal_stack = node
+                                        break
+                return self.hcb.distances.distancesFrom(goal_stack)[self.CTS_pos] + to_exit[goal_stack]
+
+        def blockingHeuristic(self):
                 """
-                This method computes the childs to which we can move from this node and returns them through an iterable
+                Admissible and consistent heuristic that, on top of the distances, counts the fixed costs that are still to be paid. With h(c) = 1 + weight of cask c:
+                        -> if the goal cask is on the CTS, it has to be carried to the EXIT: h(goal) * distance to the EXIT
+                        -> otherwise: distance to the stack of the goal cask + 2 * h(c) for each cask c above the goal cask (it has to be loaded and
+                           unloaded somewhere else) + h(goal) to load the goal cask + h(goal) * distance from that stack to the EXIT, + h(c) to unload
+                           the cask c on the CTS, if there's one
+                The part that only depends on the stack of the goal cask is cached in the HCB.
+                """
+                hcb = self.hcb
+                goal = hcb.goal
+                to_exit = hcb.distances.distancesFrom(hcb.exit)
+                if self.cask_on_CTS == goal:
+                        return hcb.handlingCost[goal] * to_exit[self.CTS_pos]
+
+                goal_stack = hcb.goalStackIndex
+                stack = self.getStack(goal_stack)
+                if goal not in stack[1:]: # the goal cask was unloaded somewhere else, which is never optimal but has to be evaluated
+                        for node in hcb.stackNodes:
+                                if goal in self.getStack(node)[1:]:
+                                        goal_stack = node
+                                        stack = self.getStack(node)
+                                        break
+
+                fixed = hcb.blockingCache.get(stack) if goal_stack == hcb.goalStackIndex else None
+                if fixed == None:
+                        fixed = hcb.handlingCost[goal] * (1 + to_exit[goal_stack])
+                        for cask in stack[stack.index(goal, 1) + 1:]:
+                                fixed += 2 * hcb.handlingCost[cask]
+                        if goal_stack == hcb.goalStackIndex:
+                                hcb.blockingCache[stack] = fixed
+
+                h = hcb.distances.distancesFrom(goal_stack)[self.CTS_pos] + fixed
+                if self.cask_on_CTS != None:
+                        h += hcb.handlingCost[self.cask_on_CTS]
+                return h
+
+        def successors(self):
                 """
-                children = []
+                This method computes the childs to which we can move from this node, lazily: it yields (key, cost, build) for each of them, where build()
+                instantiates the child. With the relevance pruning (see HCB.analyseRelevance), the operations that can't be part of an optimal solution
+                are left out
+                """
+                prune = self.hcb.prune
                 if self.unloadIsFeasible():
-                        if self.caskFitsStack():
-                                cost = self.getUnloadCost()
-                                children.append( (self.unload(), cost + self.cost))
+                        if self.caskFitsStack() and (not prune or self.unloadIsRelevant()):
+                                yield self.unload()
                 elif self.loadIsFeasible():
-                        if self.stackHasCasks():
-                                cask_on_CTS = self.getCaskOnThisStack()
-                                cost = self.getLoadCost(cask_on_CTS)
-                                children.append( (self.load(), cost + self.cost))
-
-                for neighbour in self.hcb.nodes[self.CTS_pos].neighbours:
-                        if self.moveIsFeasible(neighbour):
-                                cost = self.getMoveCost(neighbour)
-                                children.append( (self.move(neighbour), cost + self.cost))
-
-                return children
+                        if self.stackHasCasks() and (not prune or self.loadIsRelevant()):
+                                yield self.load()
 
+                if self.hcb.macro:
+                        for to in self.macroMoveTargets():
+                                path = self.hcb.route(self.CTS_pos, to)
+                                if path is not None:
+                                        yield self.macroMove(to, path[1])
+                        return
 
-# implementation of dijkstra's algorithm, used to compute the shortest paths between nodes in the HCB
-def dijkstra(_nodes, initial):
-        costs = {initial.id: (0,'')}
-        nodes = set(_nodes)
+                for (neighbour, edge) in self.hcb.adjacency[self.CTS_pos]:
+                        if self.moveIsFeasible(neighbour) and (not prune or self.moveIsRelevant(neighbour, edge)):
+                                yield self.move(neighbour, edge)
 
-        while nodes:
-                min_node = None
-                for node in nodes:
-                        if node.id in costs:
-                                if min_node is None:
-                                        min_node = node
-                                elif costs[node.id][0] < costs[min_node.id][0]:
-                                        min_node = node
-
-                if min_node is None:
-                        break
-
-                nodes.remove(min_node)
-                current_weight = costs[min_node.id][0]
-
-                for neighbour_id in min_node.neighbours:
-                        weight = current_weight + min_node.neighbours[neighbour_id]
-                        if neighbour_id not in costs or weight < costs[neighbour_id][0]:
-                                costs[neighbour_id] = (weight, min_node.id)
+        def expand(self):
+                """
+                This method computes the childs to which we can move from this node and returns them through an iterable
+                """
+                return [(build(), cost) for (key, cost, build) in self.successors()]
 
-        return costs
+# heuristics that can be selected when creating the HCB
+heuristics = {'distance': HCBStateRepresentation.distanceHeuristic, 'blocking': HCBStateRepresentation.blockingHeuristic}
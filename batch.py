@@ -0,0 +1,98 @@
+"""
+Solves many (yard file, goal cask) jobs in one run. Each yard file is read once and its graph and shortest path tables are shared by every job
+on it; the jobs are spread over a pool of processes and their results are written to stdout as JSON lines, in the order they finish.
+
+usage: python batch.py jobs [--processes N] [--algorithm astar|ucs|idastar] [--heuristic name] [--cache]
+
+jobs is a file (- for stdin) with one job per line, either "filename goalCask" or a JSON object {"file": ..., "goal": ..., "algorithm": ..., "heuristic": ...}
+where algorithm and heuristic are optional and default to the command line options.
+"""
+from search import *
+from HCB import *
+import argparse
+import json
+import multiprocessing
+import sys
+
+algorithms = {'astar': AStar, 'ucs': uniformCost, 'idastar': IDAStar}
+
+yards = dict() # keys = file names, values = Yard, or the error raised while reading the file. Filled before the pool is forked
+
+def readJobs(f, algorithm, heuristic):
+        jobs = []
+        for line in f:
+                line = line.strip()
+                if line == '':
+                        continue
+                if line[0] == '{':
+                        job = json.loads(line)
+                else:
+                        (filename, goal) = line.split()
+                        job = {'file': filename, 'goal': goal}
+                job.setdefault('algorithm', algorithm)
+                job.setdefault('heuristic', heuristic)
+                jobs.append(job)
+        return jobs
+
+def loadYards(jobs, cache):
+        """
+        Reads every yard file once and computes the shortest path tables the heuristics will need, so that the workers inherit them
+        """
+        for job in jobs:
+                if job['file'] not in yards:
+                        try:
+                                yards[job['file']] = Yard(job['file'], cache)
+                        except Exception as e:
+                                yards[job['file']] = e
+                yard = yards[job['file']]
+                if isinstance(yard, Yard) and job['algorithm'] != 'ucs' and job['goal'] in yard.caskStack:
+                        yard.distances.fromSource(yard.exit)
+                        yard.distances.fromSource(yard.nodeIndex[yard.caskStack[job['goal']]])
+        if cache:
+                for yard in yards.values():
+                        if isinstance(yard, Yard):
+                                yard.updateCache()
+
+def runJob(numbered_job):
+        """
+        Solves one job. Any error, such as a missing goal cask, only fails this job
+        """
+        (number, job) = numbered_job
+        result = {'job': number, 'file': job['file'], 'goal': job['goal']}
+        try:
+                yard = yards[job['file']]
+                if not isinstance(yard, Yard):
+                        raise yard
+                if job['algorithm'] not in algorithms:
+                        raise ValueError("unknown algorithm: {}".format(job['algorithm']))
+                hcb = HCB(yard, job['goal'], job['algorithm'] != 'ucs', heuristic=job['heuristic'])
+                (lines, cost) = algorithms[job['algorithm']](hcb.initial_state)
+                result['plan'] = lines
+                result['cost'] = cost
+        except Exception as e:
+                result['error'] = "{}: {}".format(type(e).__name__, e)
+        return result
+
+def main(argv):
+        parser = argparse.ArgumentParser(description="Solves a batch of HCB problems")
+        parser.add_argument("jobs", help="file with one job per line, - for stdin")
+        parser.add_argument("--processes", type=int, default=None, help="size of the process pool (default: one per CPU)")
+        parser.add_argument("--algorithm", choices=sorted(algorithms), default='astar')
+        parser.add_argument("--heuristic", choices=sorted(heuristics), default='blocking')
+        parser.add_argument("--cache", action='store_true', help="keep each yard in a compiled cache file next to it, and load it from there when it's up to date")
+        args = parser.parse_args(argv)
+
+        if args.jobs == '-':
+                jobs = readJobs(sys.stdin, args.algorithm, args.heuristic)
+        else:
+                with open(args.jobs) as f:
+                        jobs = readJobs(f, args.algorithm, args.heuristic)
+        loadYards(jobs, args.cache)
+
+        with multiprocessing.get_context('fork').Pool(args.processes) as pool:
+                for result in pool.imap_unordered(runJob, enumerate(jobs)):
+                        sys.stdout.write(json.dumps(result) + "\n")
+                        sys.stdout.flush()
+
+if __name__ == "__main__":
+        main(sys.argv[1:])
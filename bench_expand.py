@@ -0,0 +1,55 @@
+"""
+Measures how many states per second HCBStateRepresentation.successors() goes through on a yard with many stacks.
+
+usage: python bench_expand.py [n_stacks] [n_expansions]
+"""
+from HCB import *
+import os
+import sys
+import tempfile
+import time
+
+def writeYard(f, n_stacks):
+        """
+        Writes a yard with n_stacks stacks hanging from a corridor of junction nodes that starts at the EXIT. Every stack holds three casks
+        and has room for three more. The goal cask is the bottom cask of the stack furthest from the EXIT.
+        """
+        for i in range(0, n_stacks * 3):
+                f.write("C{} 1 {}\n".format(i, 1 + i % 3))
+        for i in range(0, n_stacks):
+                f.write("S{} 6 C{} C{} C{}\n".format(i, 3 * i, 3 * i + 1, 3 * i + 2))
+        previous = 'EXIT'
+        for i in range(0, n_stacks):
+                f.write("E{} {} N{} 1\n".format(2 * i, previous, i))
+                f.write("E{} N{} S{} 1\n".format(2 * i + 1, i, i))
+                previous = "N{}".format(i)
+        return "C{}".format(3 * (n_stacks - 1))
+
+def benchmark(filename, goalCask, n_expansions):
+        """
+        Expands n_expansions states in breadth-first order and returns the number of expansions per second
+        """
+        hcb = HCB(filename, goalCask, False)
+        queue = [hcb.initial_state]
+        seen = set([hcb.initial_state.__key__()])
+        expanded = 0
+        start = time.perf_counter()
+        while expanded < n_expansions and expanded < len(queue):
+                node = queue[expanded]
+                expanded += 1
+                for (key, cost, build) in node.successors():
+                        if key not in seen:
+                                seen.add(key)
+                                queue.append(build())
+        return expanded / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+        n_stacks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+        n_expansions = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+        fd, filename = tempfile.mkstemp(suffix=".txt")
+        try:
+                with os.fdopen(fd, "w") as f:
+                        goalCask = writeYard(f, n_stacks)
+                print("{} stacks: {:.0f} expansions/s".format(n_stacks, benchmark(filename, goalCask, n_expansions)))
+        finally:
+                os.remove(filename)
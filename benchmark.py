@@ -0,0 +1,141 @@
+"""
+Reproducible benchmark of the solvers on generated yards (see generator.py). Every run happens in a fresh interpreter, so that its peak RSS is its own,
+and records the wall time, the search time, the nodes expanded, the peak RSS and the cost of the solution. The results can be stored as a baseline and
+later runs compared against it: a run is a regression if its cost changed, if it expands more nodes, or if it is slower by more than the tolerance.
+
+usage: python benchmark.py [--suite quick|full] [--solvers ucs astar ...] [--baseline PATH] [--save-baseline] [--tolerance 0.25] [--json PATH]
+"""
+from generator import YardSpec, generate
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# benchmark suites: lists of (name, YardSpec). The seeds are fixed, so the yards are the same on every run
+quick = [
+        ("tree-8x4", YardSpec(seed=1, nodes=8, topology='tree', stacks=4, casks=8, goalDepth=1)),
+        ("tree-12x6", YardSpec(seed=2, nodes=12, topology='tree', stacks=6, casks=14, goalDepth=2)),
+        ("random-20x8", YardSpec(seed=5, nodes=20, topology='random', stacks=8, casks=20, goalDepth=2)),
+        ("corridor-16x6", YardSpec(seed=3, nodes=16, topology='corridor', stacks=6, casks=14, goalDepth=2)),
+        ("grid-16x8", YardSpec(seed=4, nodes=16, topology='grid', stacks=8, casks=20, goalDepth=2)),
+]
+suites = {
+        'quick': quick,
+        'full': quick + [
+                ("grid-36x10", YardSpec(seed=6, nodes=36, topology='grid', stacks=10, casks=24, goalDepth=2)),
+                ("corridor-60x16", YardSpec(seed=7, nodes=60, topology='corridor', stacks=16, casks=30, goalDepth=2)),
+        ],
+}
+
+# command line of informed.py/uninformed.py options for each solver
+solvers = {
+        'ucs': ['uninformed.py'],
+        'astar': ['informed.py'],
+        'astar-distance': ['informed.py', '--heuristic', 'distance'],
+        'ucs-prune': ['uninformed.py', '--prune'],
+        'astar-prune': ['informed.py', '--prune'],
+        'idastar': ['informed.py', '--algorithm', 'idastar'],
+}
+
+def runOne(solver, filename, goal, timeout):
+        """
+        Runs a solver on a yard in a new interpreter and returns its figures as a dict
+        """
+        here = os.path.dirname(os.path.abspath(__file__))
+        fd, stats_file = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        command = [sys.executable, os.path.join(here, solvers[solver][0]), filename, goal] + solvers[solver][1:] + ['--stats', stats_file]
+        start = time.perf_counter()
+        try:
+                output = subprocess.run(command, capture_output=True, text=True, timeout=timeout, check=True).stdout.split()
+                with open(stats_file) as f:
+                        stats = json.load(f)
+        except subprocess.TimeoutExpired:
+                return {'error': 'timeout'}
+        except (subprocess.CalledProcessError, ValueError) as e:
+                return {'error': str(e)}
+        finally:
+                os.remove(stats_file)
+        return {'wall': time.perf_counter() - start, 'search': stats['time']['search'], 'expanded': stats['nodesExpanded'],
+                'peakRSS': stats['peakRSS'], 'cost': float(output[-1]) if output[-1] != 'None' else None}
+
+def runSuite(suite, solver_names, timeout, directory):
+        """
+        Generates the yards of a suite in directory and runs every solver on them, yielding (run name, result) pairs
+        """
+        for (name, spec) in suites[suite]:
+                filename = os.path.join(directory, name + ".txt")
+                with open(filename, "w") as f:
+                        goal = generate(spec, f)
+                for solver in solver_names:
+                        yield ("{}/{}".format(name, solver), runOne(solver, filename, goal, timeout))
+
+def compare(result, base, tolerance):
+        """
+        Returns the list of regressions of a result against its baseline
+        """
+        if 'error' in result:
+                return [] if 'error' in base else [result['error']]
+        if 'error' in base:
+                return []
+        regressions = []
+        if result['cost'] != base['cost']:
+                regressions.append("cost {} != {}".format(result['cost'], base['cost']))
+        if result['expanded'] > base['expanded']:
+                regressions.append("expanded {} > {}".format(result['expanded'], base['expanded']))
+        if result['search'] > base['search'] * (1 + tolerance) and result['search'] - base['search'] > 0.01:
+                regressions.append("search {:.3f}s > {:.3f}s".format(result['search'], base['search']))
+        return regressions
+
+def main(argv):
+        parser = argparse.ArgumentParser(description="Benchmarks the solvers on generated yards")
+        parser.add_argument("--suite", choices=sorted(suites), default='quick')
+        parser.add_argument("--solvers", nargs='+', choices=sorted(solvers), default=['ucs', 'astar'])
+        parser.add_argument("--timeout", type=float, default=300, help="seconds after which a run is abandoned")
+        parser.add_argument("--baseline", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json"))
+        parser.add_argument("--save-baseline", action='store_true', help="store the results as the new baseline instead of comparing against it")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="relative slowdown of the search time that counts as a regression")
+        parser.add_argument("--json", default=None, metavar='PATH', help="also write the results as JSON to PATH")
+        args = parser.parse_args(argv)
+
+        baseline = dict()
+        if not args.save_baseline and os.path.exists(args.baseline):
+                with open(args.baseline) as f:
+                        baseline = json.load(f).get(args.suite, dict())
+
+        results = dict()
+        failed = False
+        print("{:<32} {:>9} {:>9} {:>10} {:>10} {:>10}  {}".format("run", "wall s", "search s", "expanded", "peak kB", "cost", "vs baseline"))
+        with tempfile.TemporaryDirectory() as directory:
+                for (name, result) in runSuite(args.suite, args.solvers, args.timeout, directory):
+                        results[name] = result
+                        verdict = ""
+                        if name in baseline:
+                                regressions = compare(result, baseline[name], args.tolerance)
+                                verdict = "REGRESSION: " + ", ".join(regressions) if regressions else "ok"
+                                failed = failed or bool(regressions)
+                        if 'error' in result:
+                                print("{:<32} {}  {}".format(name, result['error'], verdict))
+                        else:
+                                print("{:<32} {:>9.3f} {:>9.3f} {:>10} {:>10} {:>10}  {}".format(name, result['wall'], result['search'], result['expanded'],
+                                                                                             result['peakRSS'], result['cost'], verdict))
+                        sys.stdout.flush()
+
+        if args.json is not None:
+                with open(args.json, "w") as f:
+                        json.dump(results, f, indent=2, sort_keys=True)
+        if args.save_baseline:
+                stored = dict()
+                if os.path.exists(args.baseline):
+                        with open(args.baseline) as f:
+                                stored = json.load(f)
+                stored[args.suite] = results
+                with open(args.baseline, "w") as f:
+                        json.dump(stored, f, indent=2, sort_keys=True)
+        return 1 if failed else 0
+
+if __name__ == "__main__":
+        sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,125 @@
+"""
+Checks, on random yards made by generator.py, that the solvers that reuse or leave out work find solutions as cheap as a plain AStar search: the
+incremental solver of incremental.py, after random changes of edge costs and of the goal cask, is compared with AStar run from scratch on the changed
+yard, and the relevance pruning (--prune) and the macro moves (--macro), on their own and together, with AStar and with Uniform Cost, are compared
+with AStar without them.
+Every mismatch, and every check that takes more than TIME_LIMIT seconds, is printed, and the exit status is 1 if there was any.
+
+usage: python check_costs.py [n_yards] [seed]
+"""
+from generator import YardSpec, generate, topologies
+from HCB import *
+from search import *
+from incremental import IncrementalSolver, fromScratch, apply
+from plancache import solverName
+import os
+import random
+import signal
+import sys
+import tempfile
+
+CHANGES = 6 # changes applied to the incremental solver on each yard
+TIME_LIMIT = 30 # seconds a check gets on a yard; the yards are small, so a check that takes longer is stuck
+
+class TimeLimit(Exception):
+        pass
+
+def timeUp(signum, frame):
+        raise TimeLimit()
+
+def randomSpec(rnd):
+        """
+        Returns the spec of a random yard that is small enough for every solver to go through it in a fraction of a second. The stacks are small, so
+        that the casks above the goal cask often have to be moved more than once, which is where the pruning rules matter
+        """
+        return YardSpec(seed=rnd.randrange(0, 10 ** 6), nodes=rnd.randint(2, 6), topology=rnd.choice(topologies), stacks=rnd.randint(2, 4),
+                        stackSize=(2, rnd.randint(3, 6)), casks=rnd.randint(3, 7), length=(1, rnd.randint(1, 3)), goalDepth=rnd.randint(0, 3))
+
+def sameCost(a, b):
+        return a == b or (a is not None and b is not None and abs(a - b) <= EPSILON)
+
+def describe(changes):
+        return ", ".join(" ".join(change) for change in changes) or "no change"
+
+def checkIncremental(filename, goalCask, heuristic, rnd):
+        """
+        Applies CHANGES random changes, each an edge cost or the goal cask, to an IncrementalSolver, solving after each one. Returns the description of
+        the first change after which its cost differs from the one of AStar, or after which it doesn't answer within TIME_LIMIT seconds, in a list that
+        is empty if there's none
+        """
+        yard = Yard(filename)
+        changes = []
+        signal.alarm(TIME_LIMIT)
+        try:
+                solver = IncrementalSolver(yard, goalCask, heuristic)
+                solver.solve()
+                for i in range(0, CHANGES):
+                        if rnd.random() < 0.7:
+                                edges = [(a, b) for a in range(0, len(yard.adjacency)) for (b, cost) in yard.adjacency[a] if a < b]
+                                (a, b) = rnd.choice(edges)
+                                changes.append(('edge', yard.nodeIds[a], yard.nodeIds[b], str(rnd.randint(1, 6))))
+                        else:
+                                changes.append(('goal', rnd.choice(sorted(yard.caskStack))))
+                        apply(solver, changes[-1])
+                        cost = solver.solve()[1]
+                        expected = fromScratch(yard, solver.hcb.goalCask, heuristic)[1]
+                        if not sameCost(cost, expected):
+                                return ["incremental/{} after {}: cost {} instead of {}".format(heuristic, describe(changes), cost, expected)]
+        except TimeLimit:
+                return ["incremental/{} after {}: no answer after {} s".format(heuristic, describe(changes), TIME_LIMIT)]
+        finally:
+                signal.alarm(0)
+        return []
+
+def checkOptions(filename, goalCask):
+        """
+        Solves the problem with every combination of macro moves and relevance pruning, and returns the descriptions of the solvers whose cost differs
+        from the one of AStar without them
+        """
+        yard = Yard(filename)
+        expected = AStar(HCB(yard, goalCask, True).initial_state)[1]
+        failures = []
+        for (macro, prune) in ((False, True), (True, False), (True, True)):
+                costs = []
+                signal.alarm(TIME_LIMIT)
+                try:
+                        name = solverName('ucs', macro=macro, prune=prune)
+                        costs.append((name, uniformCost(HCB(yard, goalCask, False, macro=macro, prune=prune).initial_state)[1]))
+                        for heuristic in sorted(heuristics):
+                                name = solverName('astar', heuristic, macro, prune)
+                                costs.append((name, AStar(HCB(yard, goalCask, True, heuristic=heuristic, macro=macro, prune=prune).initial_state)[1]))
+                except TimeLimit:
+                        failures.append("{}: no answer after {} s".format(name, TIME_LIMIT))
+                finally:
+                        signal.alarm(0)
+                failures += ["{}: cost {} instead of {}".format(name, cost, expected) for (name, cost) in costs if not sameCost(cost, expected)]
+        return failures
+
+def checkYard(filename, goalCask, rnd):
+        """
+        Runs every check on a yard and returns the descriptions of the mismatches
+        """
+        failures = []
+        for heuristic in sorted(heuristics):
+                failures += checkIncremental(filename, goalCask, heuristic, rnd)
+        return failures + checkOptions(filename, goalCask)
+
+if __name__ == "__main__":
+        n_yards = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+        rnd = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+        signal.signal(signal.SIGALRM, timeUp)
+        fd, filename = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        failures = 0
+        try:
+                for i in range(0, n_yards):
+                        spec = randomSpec(rnd)
+                        with open(filename, "w") as f:
+                                goalCask = generate(spec, f)
+                        for failure in checkYard(filename, goalCask, rnd):
+                                print("yard {} (seed {}, {}): {}".format(i, spec.seed, spec.topology, failure))
+                                failures += 1
+        finally:
+                os.remove(filename)
+        print("{} yards: {} mismatches".format(n_yards, failures))
+        sys.exit(1 if failures else 0)
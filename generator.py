@@ -0,0 +1,130 @@
+"""
+Generates random HCB yard files, in the format HCB reads (C, S and E lines), from a seed.
+
+usage: python generator.py output [--seed N] [--nodes N] [--topology tree|corridor|grid|random] [--stacks N] [--stack-size MIN MAX]
+                                  [--casks N] [--length MIN MAX] [--weight MIN MAX] [--edge MIN MAX] [--goal-depth N]
+
+The goal cask is printed on stdout.
+"""
+import argparse
+import random
+import sys
+
+topologies = ('tree', 'corridor', 'grid', 'random')
+
+class YardSpec:
+        """
+        Parameters of a generated yard. Lengths, weights and edge costs are drawn uniformly from their (min, max) ranges; lengths and edge costs are
+        integers, weights are rounded to one decimal. goalDepth is the number of casks above the goal cask (its stack grows if they don't fit).
+        """
+        def __init__(self, seed=0, nodes=10, topology='tree', stacks=5, stackSize=(4, 8), casks=10, length=(1, 3), weight=(0.5, 3.0),
+                     edge=(1, 3), goalDepth=1):
+                self.seed = seed
+                self.nodes = nodes # junction nodes, not counting the stacks and the EXIT
+                self.topology = topology
+                self.stacks = stacks
+                self.stackSize = stackSize
+                self.casks = casks
+                self.length = length
+                self.weight = weight
+                self.edge = edge
+                self.goalDepth = goalDepth
+
+def junctionEdges(rnd, spec, junctions):
+        """
+        Returns the edges between the EXIT and the junction nodes, as (node, node) pairs, for the topology of spec. The graph is always connected
+        """
+        nodes = ['EXIT'] + junctions
+        edges = []
+        if spec.topology == 'corridor':
+                edges = [(nodes[i - 1], nodes[i]) for i in range(1, len(nodes))]
+        elif spec.topology == 'grid':
+                width = max(1, int(len(nodes) ** 0.5))
+                for i in range(1, len(nodes)):
+                        if i % width != 0:
+                                edges.append((nodes[i - 1], nodes[i]))
+                        if i >= width:
+                                edges.append((nodes[i - width], nodes[i]))
+        else:
+                edges = [(nodes[rnd.randrange(0, i)], nodes[i]) for i in range(1, len(nodes))]
+                if spec.topology == 'random': # a random tree plus about one extra edge for every two nodes
+                        existing = set(frozenset(edge) for edge in edges)
+                        for i in range(0, len(nodes) // 2):
+                                (a, b) = rnd.sample(nodes, 2)
+                                if frozenset((a, b)) not in existing:
+                                        existing.add(frozenset((a, b)))
+                                        edges.append((a, b))
+        return edges
+
+def generate(spec, f):
+        """
+        Writes the yard described by spec to the file object f and returns the id of the goal cask
+        """
+        if spec.topology not in topologies:
+                raise ValueError("unknown topology: {}".format(spec.topology))
+        if spec.casks < 1 or spec.stacks < 2:
+                raise ValueError("a yard needs at least two stacks and one cask")
+        rnd = random.Random(spec.seed)
+        junctions = ["N{}".format(i) for i in range(0, spec.nodes)]
+        stacks = ["S{}".format(i) for i in range(0, spec.stacks)]
+        sizes = [rnd.randint(spec.stackSize[0], spec.stackSize[1]) for stack in stacks]
+        casks = [("C{}".format(i), rnd.randint(spec.length[0], spec.length[1]), round(rnd.uniform(spec.weight[0], spec.weight[1]), 1)) for i in range(0, spec.casks)]
+
+        # the goal cask goes to the first stack, with goalDepth casks above it; the stack grows if they don't fit
+        contents = [[] for stack in stacks]
+        used = [0] * len(stacks)
+        goal = casks[0]
+        above = casks[1:1 + spec.goalDepth]
+        contents[0] = [goal[0]] + [cask[0] for cask in above]
+        used[0] = goal[1] + sum(cask[1] for cask in above)
+        sizes[0] = max(sizes[0], used[0])
+        for cask in casks[1 + len(above):]:
+                fitting = [i for i in range(1, len(stacks)) if used[i] + cask[1] <= sizes[i]]
+                if not fitting: # the yard is full: the cask goes to the emptiest stack, which grows
+                        fitting = [min(range(1, len(stacks)), key=lambda i: used[i])]
+                        sizes[fitting[0]] = used[fitting[0]] + cask[1]
+                i = rnd.choice(fitting)
+                contents[i].append(cask[0])
+                used[i] += cask[1]
+        # the yard is solvable as long as some other stack can take every cask above the goal cask at once
+        roomiest = max(range(1, len(stacks)), key=lambda i: sizes[i] - used[i])
+        sizes[roomiest] = max(sizes[roomiest], used[roomiest] + used[0] - goal[1])
+
+        for (cask_id, length, weight) in casks:
+                f.write("{} {} {}\n".format(cask_id, length, weight))
+        for (i, stack_id) in enumerate(stacks):
+                f.write(" ".join([stack_id, str(sizes[i])] + contents[i]) + "\n")
+
+        edges = junctionEdges(rnd, spec, junctions)
+        attach = ['EXIT'] + junctions
+        edges += [(rnd.choice(attach), stack_id) for stack_id in stacks] # every stack hangs from a junction node (or from the EXIT)
+        for (i, (a, b)) in enumerate(edges):
+                f.write("E{} {} {} {}\n".format(i, a, b, rnd.randint(spec.edge[0], spec.edge[1])))
+        return goal[0]
+
+def main(argv):
+        parser = argparse.ArgumentParser(description="Generates a random HCB yard file and prints its goal cask")
+        parser.add_argument("output", help="file to write, - for stdout")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--nodes", type=int, default=10, help="number of junction nodes")
+        parser.add_argument("--topology", choices=topologies, default='tree')
+        parser.add_argument("--stacks", type=int, default=5)
+        parser.add_argument("--stack-size", type=int, nargs=2, default=(4, 8), metavar=('MIN', 'MAX'))
+        parser.add_argument("--casks", type=int, default=10)
+        parser.add_argument("--length", type=int, nargs=2, default=(1, 3), metavar=('MIN', 'MAX'))
+        parser.add_argument("--weight", type=float, nargs=2, default=(0.5, 3.0), metavar=('MIN', 'MAX'))
+        parser.add_argument("--edge", type=int, nargs=2, default=(1, 3), metavar=('MIN', 'MAX'))
+        parser.add_argument("--goal-depth", type=int, default=1, help="number of casks above the goal cask")
+        args = parser.parse_args(argv)
+
+        spec = YardSpec(args.seed, args.nodes, args.topology, args.stacks, tuple(args.stack_size), args.casks, tuple(args.length), tuple(args.weight),
+                        tuple(args.edge), args.goal_depth)
+        if args.output == '-':
+                goal = generate(spec, sys.stdout)
+        else:
+                with open(args.output, "w") as f:
+                        goal = generate(spec, f)
+                print(goal)
+
+if __name__ == "__main__":
+        main(sys.argv[1:])
@@ -0,0 +1,303 @@
+"""
+Incremental re-planning for a yard that changes a little between requests. IncrementalSolver keeps its search between calls to solve, in the manner of
+Lifelong Planning AStar, and takes deltas: a new edge cost or a new goal cask. A cask put on or taken out of a stack changes every state, so it isn't a
+delta: the solver applies it to the yard and starts its search over.
+
+usage: python incremental.py filename goalCask deltas
+
+deltas is a file (- for stdin) with one change per line: "edge A B cost", "goal C", "add C length weight S" or "remove C". After the first solve and after
+each change, the cost and the time of the solve are printed next to the ones of an AStar search from scratch; the changes after which the search started
+over are marked "(restart)".
+"""
+from search import *
+from HCB import *
+from shortestpaths import ShortestPaths
+import heapq
+import sys
+import time
+
+KEY_DIGITS = 9 # decimal digits kept in the keys of the fringe (see IncrementalSolver.calculateKey)
+
+def consistent(g, rhs):
+        return g == rhs or abs(g - rhs) <= EPSILON # g == rhs also covers two infinite costs
+
+class IncrementalSolver:
+        """
+        Lifelong Planning AStar on the state space of an HCB problem. For every state it has seen, the solver keeps g, the cost of the best path from the
+        initial state found by the last solve, rhs, the cost that follows from the g of its predecessors, and the cost of the operation from each of them.
+        A state is consistent when both are equal; the fringe holds the inconsistent ones, ordered by (min(g, rhs) + heuristic, min(g, rhs)), and solve only
+        expands those until the best goal state is consistent and no state in the fringe can lead to a cheaper one. A change of the yard makes some states
+        inconsistent, so the next solve only repairs what the change affects:
+                -> updateEdge repairs the shortest path tables, updates the cost of the moves along the edge from the states that were expanded, and
+                   recomputes the keys of the fringe (the heuristic changed)
+                -> setGoal keeps g and rhs, which don't depend on the goal, and recomputes the keys of the fringe
+                -> addCask and removeCask aren't repaired: the stacks are part of every state, so no state seen before exists any more. They change the
+                   yard and start the search over, keeping only the shortest path tables
+        The costs are sums of floats, added in different orders along different paths, so the keys are rounded to KEY_DIGITS decimal digits, which
+        makes the keys that only differ by rounding errors equal in the heap and in the stop test, and g and rhs are compared with a tolerance of
+        EPSILON: a state whose g and rhs differ by less is consistent.
+        For the g of a state to only depend on the state, the operations aren't restricted by the previous one (see HCBStateRepresentation.moveIsFeasible),
+        which doesn't change the cost of the optimal solution. The macro moves aren't supported.
+        """
+        def __init__(self, yard, goalCask, heuristic='blocking'):
+                self.yard = yard
+                self.heuristicName = heuristic
+                self.hcb = HCB(yard, goalCask, True, heuristic=heuristic)
+                self.reset()
+
+        def reset(self):
+                """
+                Forgets the search, which starts over from the initial state of the problem
+                """
+                self.root = self.hcb.initial_state.__key__()
+                self.g = dict() # keys = state keys. A state that isn't here has an infinite g
+                self.rhs = {self.root: 0}
+                self.preds = {self.root: dict()} # keys = state keys, values = dicts whose keys are the predecessors' keys and values the cost of the operation
+                self.at = dict() # keys = node indices, values = set of the keys of the expanded states where the CTS is at that node
+                self.goals = set() # keys of the goal states that were generated
+                self.heuristics = dict() # keys = state keys, values = heuristic of the state
+                self.fringe = [] # heap of (k1, k2, order, key). Entries whose key isn't the one in self.queued are stale
+                self.queued = dict() # keys = state keys, values = (k1, k2) of the states in the fringe
+                self.counter = 0
+                self.push(self.root)
+
+        def state(self, key, cost=0):
+                """
+                Builds the state with the given key, with no previous operation so that none of its operations is ruled out
+                """
+                return HCBStateRepresentation(None, self.hcb, cost, key[1], key[2], key[3], '', key[0])
+
+        def isGoal(self, key):
+                return key[3] == self.hcb.goal and key[2] == self.hcb.exit
+
+        def heuristic(self, key):
+                h = self.heuristics.get(key)
+                if h is None:
+                        h = self.heuristics[key] = self.state(key).heuristic()
+                return h
+
+        def calculateKey(self, key):
+                m = min(self.g.get(key, INFINITY), self.rhs.get(key, INFINITY))
+                return (round(m + self.heuristic(key), KEY_DIGITS), round(m, KEY_DIGITS))
+
+        def push(self, key):
+                k = self.calculateKey(key)
+                self.queued[key] = k
+                heapq.heappush(self.fringe, (k[0], k[1], self.counter, key))
+                self.counter += 1
+
+        def top(self):
+                while self.fringe:
+                        (k1, k2, order, key) = self.fringe[0]
+                        if self.queued.get(key) == (k1, k2):
+                                return self.fringe[0]
+                        heapq.heappop(self.fringe)
+                return None
+
+        def rebuildFringe(self):
+                """
+                Recomputes the keys of every state in the fringe, after a change of the heuristic
+                """
+                self.queued = dict((key, self.calculateKey(key)) for key in self.queued)
+                self.fringe = [(k[0], k[1], i, key) for (i, (key, k)) in enumerate(self.queued.items())]
+                heapq.heapify(self.fringe)
+                self.counter = len(self.fringe)
+
+        def updateVertex(self, key):
+                if key != self.root:
+                        self.rhs[key] = min([self.g.get(p, INFINITY) + cost for (p, cost) in self.preds[key].items()] or [INFINITY])
+                if not consistent(self.g.get(key, INFINITY), self.rhs.get(key, INFINITY)):
+                        self.push(key)
+                else:
+                        self.queued.pop(key, None)
+
+        def successors(self, key, stats):
+                """
+                Returns the (key, cost) pairs of the states that follow the given one, recording it as their predecessor
+                """
+                children = [(child_key, cost) for (child_key, cost, build) in self.state(key).successors()]
+                stats.nodesGenerated += len(children)
+                for (child_key, cost) in children:
+                        self.preds.setdefault(child_key, dict())[key] = cost
+                        if self.isGoal(child_key):
+                                self.goals.add(child_key)
+                self.at.setdefault(key[2], set()).add(key)
+                return children
+
+        def bestGoal(self):
+                return min(self.goals, key=lambda key: self.g.get(key, INFINITY), default=None)
+
+        def computeShortestPath(self, stats):
+                best = self.bestGoal()
+                while True:
+                        top = self.top()
+                        if top is None:
+                                break
+                        goal_g = INFINITY if best is None else self.g.get(best, INFINITY)
+                        goal_key = round(goal_g, KEY_DIGITS)
+                        if (top[0], top[1]) >= (goal_key, goal_key) and consistent(goal_g, self.rhs.get(best, INFINITY)):
+                                break
+                        key = top[3]
+                        heapq.heappop(self.fringe)
+                        old = self.queued.pop(key)
+                        new = self.calculateKey(key)
+                        if old < new:
+                                self.push(key)
+                                continue
+                        stats.nodesExpanded += 1
+                        if self.g.get(key, INFINITY) > self.rhs[key]: # the state got cheaper: so may its successors
+                                self.g[key] = self.rhs[key]
+                                for (child_key, cost) in self.successors(key, stats):
+                                        if child_key != self.root and self.g[key] + cost < self.rhs.get(child_key, INFINITY):
+                                                self.rhs[child_key] = self.g[key] + cost
+                                                self.updateVertex(child_key)
+                        else: # the state got more expensive: its successors have to look for another predecessor
+                                del self.g[key]
+                                for (child_key, cost) in self.successors(key, stats):
+                                        self.updateVertex(child_key)
+                                self.updateVertex(key)
+                        if self.isGoal(key): # only the g of the goal states can change which one is the best
+                                best = self.bestGoal()
+                        if len(self.queued) > stats.peakFringeSize:
+                                stats.peakFringeSize = len(self.queued)
+                return best
+
+        def plan(self, goal):
+                """
+                Rebuilds the solution path that ends in the given goal state, as states linked by their parents. From each state, it goes back to the
+                predecessor p, not already on the path, for which g(p) + cost of the operation equals g of the state, which exists once the search
+                is done. Raises RuntimeError if there's none: the search left the path inconsistent
+                """
+                path = [goal]
+                visited = set(path)
+                while path[-1] != self.root:
+                        g = self.g.get(path[-1], INFINITY)
+                        preds = self.preds[path[-1]]
+                        candidates = [p for p in preds if p not in visited and consistent(self.g.get(p, INFINITY) + preds[p], g)]
+                        if not candidates or g == INFINITY:
+                                raise RuntimeError("no consistent predecessor on the path to the goal")
+                        path.append(min(candidates, key=lambda p: self.g[p] + preds[p]))
+                        visited.add(path[-1])
+                path.reverse()
+                node = self.hcb.initial_state
+                for key in path[1:]:
+                        for (child_key, cost, build) in self.state(node.__key__(), node.cost).successors():
+                                if child_key == key:
+                                        child = build()
+                                        child.parent = node
+                                        node = child
+                                        break
+                        else:
+                                raise RuntimeError("a state on the path to the goal isn't a successor of the previous one")
+                return node
+
+        def solve(self, stats=None):
+                """
+                Brings the search up to date with the changes made since the last call.
+
+                returns (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution, as a SearchResult
+                """
+                start = time.perf_counter()
+                if stats is None:
+                        stats = SearchStats()
+                if self.hcb.initial_state.checksol():
+                        return finishSearch(self.hcb.initial_state.backtrack_sol(self.hcb.initial_state), stats, start)
+                best = self.computeShortestPath(stats)
+                stats.peakExploredSize = len(self.g)
+                if best is None or self.g.get(best, INFINITY) == INFINITY:
+                        return finishSearch((None, None), stats, start)
+                return finishSearch(self.plan(best).backtrack_sol(self.hcb.initial_state), stats, start)
+
+        def updateEdge(self, a, b, cost):
+                """
+                Sets the cost of the edge between the nodes with ids a and b
+                """
+                self.yard.updateEdge(a, b, cost)
+                self.hcb.blockingCache.clear()
+                self.heuristics.clear()
+                (i, j) = (self.hcb.nodeIndex[a], self.hcb.nodeIndex[b])
+                stats = SearchStats()
+                for (node, other) in ((i, j), (j, i)):
+                        for key in list(self.at.get(node, ())):
+                                for (child_key, cost) in self.successors(key, stats):
+                                        if child_key[2] == other:
+                                                self.updateVertex(child_key)
+                self.rebuildFringe()
+
+        def setGoal(self, goalCask):
+                """
+                Changes the goal cask. Raises GoalCaskError if it isn't in any of the stacks
+                """
+                self.hcb = HCB(self.yard, goalCask, True, heuristic=self.heuristicName)
+                self.heuristics.clear()
+                self.goals = set(key for key in self.preds if self.isGoal(key))
+                self.rebuildFringe()
+
+        def addCask(self, cask_id, length, weight, stack_id):
+                """
+                Puts a new cask on top of a stack and starts the search over (see the class docstring)
+                """
+                self.yard.addCask(cask_id, length, weight, stack_id)
+                self.hcb = HCB(self.yard, self.hcb.goalCask, True, heuristic=self.heuristicName)
+                self.reset()
+
+        def removeCask(self, cask_id):
+                """
+                Takes a cask out of its stack and starts the search over (see the class docstring)
+                """
+                if cask_id == self.hcb.goalCask:
+                        raise GoalCaskError("The goal cask can't be removed.")
+                self.yard.removeCask(cask_id)
+                self.hcb = HCB(self.yard, self.hcb.goalCask, True, heuristic=self.heuristicName)
+                self.reset()
+
+def fromScratch(yard, goalCask, heuristic):
+        """
+        Solves the problem with AStar and new shortest path tables, as if the yard had just been read
+        """
+        start = time.perf_counter()
+        hcb = HCB(yard, goalCask, True, heuristic=heuristic)
+        hcb.distances = ShortestPaths(yard.adjacency)
+        result = AStar(hcb.initial_state)
+        result.stats.time['search'] = time.perf_counter() - start
+        return result
+
+def apply(solver, delta):
+        if delta[0] == 'edge':
+                solver.updateEdge(delta[1], delta[2], float(delta[3]))
+        elif delta[0] == 'goal':
+                solver.setGoal(delta[1])
+        elif delta[0] == 'add':
+                solver.addCask(delta[1], int(delta[2]), float(delta[3]), delta[4])
+        elif delta[0] == 'remove':
+                solver.removeCask(delta[1])
+        else:
+                raise ValueError("unknown change: {}".format(" ".join(delta)))
+
+def main(argv):
+        if len(argv) != 3:
+                sys.stderr.write(__doc__)
+                sys.exit(2)
+        (filename, goalCask, deltas) = argv
+        yard = Yard(filename)
+        f = sys.stdin if deltas == '-' else open(deltas)
+        with f:
+                changes = [line.split() for line in f if line.strip()]
+
+        print("change | solver: seconds expanded cost | scratch: seconds expanded cost")
+        start = time.perf_counter()
+        solver = IncrementalSolver(yard, goalCask)
+        for delta in [None] + changes:
+                if delta is not None:
+                        start = time.perf_counter()
+                        apply(solver, delta)
+                result = solver.solve()
+                latency = time.perf_counter() - start
+                scratch = fromScratch(yard, solver.hcb.goalCask, solver.heuristicName)
+                change = "initial" if delta is None else " ".join(delta) + (" (restart)" if delta[0] in ('add', 'remove') else "")
+                print("{} | {:.4f} {} {} | {:.4f} {} {}".format(change, latency, result.stats.nodesExpanded, result[1],
+                                                                scratch.stats.time['search'], scratch.stats.nodesExpanded, scratch[1]))
+                sys.stdout.flush()
+
+if __name__ == "__main__":
+        main(sys.argv[1:])
@@ -1,10 +1,105 @@
 from search import *
 from HCB import *
+from parallel import HDAStar
+from plancache import PlanCache, fingerprint, solverName, DEFAULT_DIRECTORY
+import argparse
 import sys
 
-hcb = HCB(sys.argv[1], sys.argv[2], True)
-(lines, cost) = AStar(hcb.initial_state)
-for line in lines:
-	print(line)
+parser = argparse.ArgumentParser(description="Solves an HCB problem with an informed search algorithm")
+parser.add_argument("filename")
+parser.add_argument("goalCask")
+parser.add_argument("--heuristic", choices=sorted(heuristics), default='blocking')
+parser.add_argument("--algorithm", choices=['astar', 'idastar', 'hdastar'], default='astar', help="idastar is a memory-bounded alternative to astar, hdastar runs astar on several processes")
+parser.add_argument("--table-size", type=int, default=1000000, help="maximum number of states in the idastar transposition table")
+parser.add_argument("--workers", type=int, default=None, help="number of hdastar worker processes (default: one per CPU)")
+parser.add_argument("--cache", action='store_true', help="keep the yard in a compiled cache file next to it, and load it from there when it's up to date")
+parser.add_argument("--macro", action='store_true', help="only stop the CTS at stacks and EXIT, moving along shortest paths between them")
+parser.add_argument("--prune", action='store_true', help="leave out the operations that the relevance analysis shows can't be part of an optimal solution")
+parser.add_argument("--stats", nargs='?', const='-', default=None, metavar='PATH', help="report the search figures on stderr, or as JSON in PATH")
+parser.add_argument("--anytime", action='store_true', help="run ARA* (astar only): report improving solutions on stderr as they're found and print the best one")
+parser.add_argument("--deadline", type=float, default=None, metavar='SECONDS', help="with --anytime, stop after this many seconds with the best solution found")
+parser.add_argument("--weight", type=float, default=2.0, help="with --anytime, weight of the heuristic in the first search")
+parser.add_argument("--plan-cache", nargs='?', const=DEFAULT_DIRECTORY, default=None, metavar='DIR', help="look the solution up in a plan cache in DIR before searching, and store it there")
+parser.add_argument("--arena", action='store_true', help="astar only: keep the search nodes in compact arrays instead of as state objects")
+parser.add_argument("--fringe", choices=sorted(fringes), default='indexed', help="astar only: fringe implementation (indexed keeps the best copy of each state, tuple every copy)")
+parser.add_argument("--node-limit", type=int, default=None, metavar='N', help="with --arena, give up when N nodes are stored (implies --arena)")
+parser.add_argument("--compare-heuristics", action='store_true', help="run the algorithm with every heuristic and print the number of nodes each one expands")
+args = parser.parse_args()
+if args.anytime and args.algorithm != 'astar':
+	parser.error("--anytime only works with --algorithm astar")
+if args.node_limit is not None:
+	args.arena = True
+if args.arena and (args.algorithm != 'astar' or args.anytime):
+	parser.error("--arena only works with --algorithm astar, without --anytime")
+if args.fringe != 'indexed' and (args.algorithm != 'astar' or args.anytime or args.arena):
+	parser.error("--fringe only works with --algorithm astar, without --anytime or --arena")
 
-print("{}".format(cost))
+def anytime(hcb, stats):
+	best = (None, None)
+	for result in ARAStar(hcb.initial_state, args.weight, args.deadline, stats=stats):
+		bound = "unknown" if result.bound is None else "{:.3f}".format(result.bound)
+		sys.stderr.write("cost {} (at most {} times the optimal) after {:.3f} s\n".format(result[1], bound, result.stats.time['search']))
+		best = result
+	return best
+
+def solve(hcb, stats):
+	if args.anytime:
+		return anytime(hcb, stats)
+	elif args.algorithm == 'idastar':
+		return IDAStar(hcb.initial_state, args.table_size, stats)
+	elif args.algorithm == 'hdastar':
+		return HDAStar(hcb.initial_state, args.workers, stats=stats)
+	elif args.arena:
+		return arenaSearch(hcb.initial_state, True, args.node_limit, stats)
+	return AStar(hcb.initial_state, fringes[args.fringe], stats)
+
+if args.compare_heuristics:
+	yard = Yard(args.filename, args.cache)
+	try:
+		problems = [(name, HCB(yard, args.goalCask, True, heuristic=name, macro=args.macro, prune=args.prune)) for name in sorted(heuristics)]
+	except GoalCaskError as e:
+		print("{} Exiting.".format(e))
+		sys.exit(0)
+	print("heuristic expanded generated cost")
+	for (name, hcb) in problems:
+		stats = SearchStats()
+		(lines, cost) = solve(hcb, stats)
+		print("{} {} {} {}".format(name, stats.nodesExpanded, stats.nodesGenerated, cost))
+else:
+	try:
+		hcb = HCB(Yard(args.filename, args.cache), args.goalCask, True, heuristic=args.heuristic, macro=args.macro, prune=args.prune)
+	except GoalCaskError as e:
+		print("{} Exiting.".format(e))
+		sys.exit(0)
+	stats = SearchStats()
+	cache = None
+	cached = None
+	if args.plan_cache is not None and not (args.anytime and args.deadline is not None): # with a deadline, the solution depends on the machine
+		cache = PlanCache(args.plan_cache)
+		key = fingerprint(hcb, args.goalCask, solverName('anytime' if args.anytime else args.algorithm, args.heuristic, args.macro, args.prune))
+		cached = cache.get(key)
+	if cached is not None:
+		(lines, cost) = cached
+	else:
+		(lines, cost) = solve(hcb, stats)
+		if cache is not None and not stats.nodeLimitReached:
+			cache.put(key, lines, cost)
+	hcb.recordTimes(stats)
+	if cache is not None:
+		stats.planCache = cache.stats()
+	if stats.nodeLimitReached:
+		sys.stderr.write("node limit reached: {} nodes stored, {} expanded\n".format(stats.nodesStored, stats.nodesExpanded))
+		lines = []
+	if stats.deadlineReached and cost is None:
+		sys.stderr.write("deadline reached: no solution found, {} nodes expanded\n".format(stats.nodesExpanded))
+		lines = []
+	for line in lines:
+		print(line)
+
+	print("{}".format(cost))
+	if args.cache:
+		hcb.yard.updateCache()
+	if args.stats is not None:
+		stats.report(args.stats)
+	elif args.algorithm == 'idastar':
+		sys.stderr.write("peak memory: {} kB RSS, {} states in the transposition table, path of {} states\n".format(stats.peakRSS, stats.peakTableSize, stats.peakDepth))
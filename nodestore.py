@@ -0,0 +1,86 @@
+"""
+Compact storage of the nodes of a search tree. Instead of keeping a state object per node, each one holding references to its parent and to its
+problem, the nodes are rows of typed arrays and refer to their parents by index. The states are only rebuilt, from their keys, when they're expanded
+or when the solution path is printed. Used by arenaSearch (see search.py).
+"""
+from array import array
+
+class NodeStore:
+        """
+        Arena of search nodes, in columns: g, the cost of the best path found to the node, parent, the index of the node that path comes from (-1 for
+        the root), operation, the code of the last operation of that path (see StateRepresentation.operationCode), and closed, whether the node was
+        expanded. A state only ever has one node, whose path is replaced when a cheaper one is found, so the index of a node is also the id of its
+        state key: keys holds the key of each node and index maps the keys back to the nodes.
+        When limit isn't None, the store holds at most limit nodes: add returns None once it's full.
+        """
+        def __init__(self, root_state, limit=None):
+                self.root_state = root_state # the states are rebuilt by this one (see StateRepresentation.rebuild)
+                self.limit = limit
+                self.g = array('d')
+                self.parent = array('l')
+                self.operation = array('B')
+                self.closed = bytearray()
+                self.keys = [] # keys of the nodes, by index
+                self.index = dict() # keys = state keys, values = index of their node
+                self.add(root_state.__key__(), 0, -1, root_state.operationCode())
+
+        def __len__(self):
+                return len(self.keys)
+
+        def add(self, key, g, parent, operation):
+                """
+                Adds a node for a state that wasn't reached before, and returns its index, or None if the store is full
+                """
+                if self.limit is not None and len(self.keys) >= self.limit:
+                        return None
+                self.index[key] = len(self.keys)
+                self.keys.append(key)
+                self.g.append(g)
+                self.parent.append(parent)
+                self.operation.append(operation)
+                self.closed.append(0)
+                return len(self.keys) - 1
+
+        def update(self, i, g, parent, operation):
+                """
+                Replaces the path of node i by a cheaper one
+                """
+                self.g[i] = g
+                self.parent[i] = parent
+                self.operation[i] = operation
+
+        def state(self, i, parent=None):
+                """
+                Rebuilds the state of node i. Its parent is the given state or, if it's None, the state of the parent node rebuilt without a parent of
+                its own, which is enough for the state to compute its successors
+                """
+                p = self.parent[i]
+                if parent is None and p >= 0:
+                        parent = self.root_state.rebuild(self.keys[p], self.g[p], self.operation[p], None)
+                return self.root_state.rebuild(self.keys[i], self.g[i], self.operation[i], parent)
+
+        def chain(self, i):
+                """
+                Returns the indices of the nodes on the path from the root to node i
+                """
+                path = [i]
+                while self.parent[path[-1]] >= 0:
+                        path.append(self.parent[path[-1]])
+                path.reverse()
+                return path
+
+        def backtrack_sol(self, i):
+                """
+                Rebuilds the states on the path to node i, each linked to the previous one, and returns the solution that path stands for (see
+                StateRepresentation.backtrack_sol)
+                """
+                node = None
+                for j in self.chain(i):
+                        node = self.state(j, node) if node is not None else self.root_state
+                return node.backtrack_sol(self.root_state)
+
+        def nbytes(self):
+                """
+                Returns the number of bytes taken by the columns, without the keys and the index
+                """
+                return sum(column.itemsize * len(column) for column in (self.g, self.parent, self.operation)) + len(self.closed)
@@ -0,0 +1,243 @@
+from BinHeap import IndexedBinHeap
+from search import SearchStats, finishSearch
+import multiprocessing
+import queue
+import time
+
+# messages exchanged between the master process and the workers. Each one is a tuple whose first field is one of these tags
+STATES = 0 # master/worker -> worker: (STATES, [(packed state, parent key), ...])
+INCUMBENT = 1 # master -> worker: (INCUMBENT, cost of the best solution found so far)
+PROBE = 2 # master -> worker: (PROBE, wave). The worker answers with a STATUS
+TRACE = 3 # master -> worker: (TRACE, key). The worker answers with a RECORD
+STOP = 4 # master -> worker: (STOP,). The worker answers with a DONE and exits
+SOLUTION = 5 # worker -> master: (SOLUTION, cost, key)
+STATUS = 6 # worker -> master: (STATUS, wave, idle, batches sent, batches received)
+RECORD = 7 # worker -> master: (RECORD, parent key, operation code, cost)
+DONE = 8 # worker -> master: (DONE, expanded, generated)
+
+PROBE_INTERVAL = 0.005 # seconds between two waves of probes while some worker is busy
+
+def owner(key, workers):
+        """
+        Index of the worker that owns the state with the given key. The states are distributed by the hash of their key
+        """
+        return hash(key) % workers
+
+class Worker:
+        """
+        One of the processes of HDAStar. It owns the states whose key hashes to its index: it keeps their fringe and the best cost with which each of them
+        was reached (the bestG table of the fringe, which also plays the role of the closed list, so a state reached again with a smaller cost is reopened).
+        Children that belong to other workers are sent to them in batches. The children it owns are only built when they improve on the bestG table
+        (see StateRepresentation.successors), and the ones it receives only get their heuristic computed when they do.
+        """
+        def __init__(self, index, root_state, inboxes, master, batchSize):
+                self.index = index
+                self.root_state = root_state # only used to unpack the states received from the other processes
+                self.inboxes = inboxes
+                self.master = master
+                self.batchSize = batchSize
+                self.fringe = IndexedBinHeap()
+                self.records = dict() # keys = state keys, values = (parent key, operation code, cost) of the best path found to the state
+                self.outboxes = [[] for i in range(0, len(inboxes))]
+                self.incumbent = float('inf')
+                self.sent = 0
+                self.received = 0
+                self.expanded = 0
+                self.generated = 0
+
+        def add(self, state, parent_key):
+                key = state.__key__()
+                if not self.fringe.improves(key, state.cost):
+                        return
+                h = state.heuristic()
+                self.fringe.insert((state, state.cost + h), key, state.cost, h)
+                self.records[key] = (parent_key, state.operationCode(), state.cost)
+
+        def flush(self):
+                for (i, outbox) in enumerate(self.outboxes):
+                        if outbox:
+                                self.inboxes[i].put((STATES, outbox))
+                                self.outboxes[i] = []
+                                self.sent += 1
+
+        def idle(self):
+                return self.fringe.currentSize == 0 or self.fringe.top()[1] >= self.incumbent
+
+        def handle(self, message):
+                """
+                Handles a message from the inbox. Returns False when the worker has to stop
+                """
+                if message[0] == STATES:
+                        self.received += 1
+                        for (packed, parent_key) in message[1]:
+                                self.add(self.root_state.unpack(packed), parent_key)
+                elif message[0] == INCUMBENT:
+                        self.incumbent = min(self.incumbent, message[1])
+                elif message[0] == PROBE:
+                        self.master.put((STATUS, message[1], self.idle(), self.sent, self.received))
+                elif message[0] == TRACE:
+                        self.master.put((RECORD,) + self.records[message[1]])
+                elif message[0] == STOP:
+                        self.master.put((DONE, self.expanded, self.generated))
+                        return False
+                return True
+
+        def expandSome(self, count):
+                """
+                Expands up to count nodes from the fringe, skipping the ones that can't lead to a solution better than the incumbent
+                """
+                workers = len(self.inboxes)
+                for i in range(0, count):
+                        if self.idle():
+                                break
+                        (node, f) = self.fringe.pop()
+                        node_key = node.__key__()
+                        if node.checksol():
+                                if node.cost < self.incumbent:
+                                        self.incumbent = node.cost
+                                        self.master.put((SOLUTION, node.cost, node_key))
+                                continue
+
+                        self.expanded += 1
+                        for (child_key, child_cost, build) in node.successors():
+                                self.generated += 1
+                                destination = owner(child_key, workers)
+                                if destination == self.index:
+                                        if self.fringe.improves(child_key, child_cost):
+                                                self.add(build(), node_key)
+                                else:
+                                        self.outboxes[destination].append((build().pack(), node_key))
+                                        if len(self.outboxes[destination]) >= self.batchSize:
+                                                self.inboxes[destination].put((STATES, self.outboxes[destination]))
+                                                self.outboxes[destination] = []
+                                                self.sent += 1
+                self.flush()
+
+        def run(self):
+                inbox = self.inboxes[self.index]
+                while True:
+                        try:
+                                message = inbox.get(timeout=0.05) if self.idle() else inbox.get_nowait()
+                                while True: # drains the inbox before expanding more nodes
+                                        if not self.handle(message):
+                                                return
+                                        message = inbox.get_nowait()
+                        except queue.Empty:
+                                pass
+                        self.expandSome(self.batchSize)
+
+def runWorker(index, root_state, inboxes, master, batchSize):
+        Worker(index, root_state, inboxes, master, batchSize).run()
+
+def receive(master, processes):
+        """
+        Waits for the next message to the master process, failing if one of the workers died
+        """
+        while True:
+                try:
+                        return master.get(timeout=1)
+                except queue.Empty:
+                        for process in processes:
+                                if process.exitcode is not None and process.exitcode != 0:
+                                        raise RuntimeError("HDAStar worker {} exited with code {}".format(process.name, process.exitcode))
+
+def HDAStar(root_state, workers=None, batchSize=64, stats=None):
+        """
+        This function implements Hash Distributed AStar. States are distributed among worker processes by the hash of their key; each worker runs AStar on
+        the states it owns and sends the children owned by other workers to them, in batches. A worker that finds a solution reports it, and the cost of the
+        best one is broadcast, so that the workers stop expanding nodes whose value of (cost+heuristic) isn't smaller.
+        The search ends when every worker is idle and no batch is in transit, which is detected with waves of probes: the workers answer each probe with
+        the number of batches they have sent and received, and the search stops after two consecutive waves where every worker is idle and the totals are
+        equal and unchanged. At that point no node that could lead to a cheaper solution is left, so with an admissible heuristic the solution is optimal.
+        The solution path is rebuilt by asking the owner of each state for its parent, the code of the operation that led to it and its cost, starting
+        from the solution; the states of the path are then rebuilt from those, and the lines of the solution formatted from them.
+        The states must implement pack, unpack, operationCode and rebuild, and the processes are forked, so the problem is shared with the workers without being copied.
+        The expanded and generated nodes of every worker are added to stats (a new SearchStats if it's None).
+
+        returns (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution, as a SearchResult
+        """
+        start = time.perf_counter()
+        if stats is None:
+                stats = SearchStats()
+        if workers is None:
+                workers = multiprocessing.cpu_count()
+        if root_state.checksol():
+                return finishSearch(root_state.backtrack_sol(root_state), stats, start)
+        root_state.heuristic() # computes whatever the heuristic caches before forking, so that the workers inherit it
+
+        context = multiprocessing.get_context('fork')
+        inboxes = [context.Queue() for i in range(0, workers)]
+        master = context.Queue()
+        processes = [context.Process(target=runWorker, args=(i, root_state, inboxes, master, batchSize)) for i in range(0, workers)]
+        for process in processes:
+                process.start()
+
+        try:
+                root_key = root_state.__key__()
+                inboxes[owner(root_key, workers)].put((STATES, [(root_state.pack(), None)]))
+                sent = 1 # batches sent by the master
+                incumbent = float('inf')
+                solution = None
+                wave = 0
+                answers = []
+                previous = None # (sent, received) of the last wave where every worker was idle
+                for inbox in inboxes:
+                        inbox.put((PROBE, wave))
+                while True:
+                        message = receive(master, processes)
+                        if message[0] == SOLUTION:
+                                if message[1] < incumbent:
+                                        incumbent = message[1]
+                                        solution = message[2]
+                                        for inbox in inboxes:
+                                                inbox.put((INCUMBENT, incumbent))
+                        elif message[0] == STATUS and message[1] == wave:
+                                answers.append(message)
+                                if len(answers) == workers:
+                                        totals = (sent + sum(answer[3] for answer in answers), sum(answer[4] for answer in answers))
+                                        if all(answer[2] for answer in answers) and totals[0] == totals[1]:
+                                                if totals == previous:
+                                                        break
+                                                previous = totals
+                                        else:
+                                                previous = None
+                                                time.sleep(PROBE_INTERVAL) # the workers are busy: probing them again right away would only slow them down
+                                        wave += 1
+                                        answers = []
+                                        for inbox in inboxes:
+                                                inbox.put((PROBE, wave))
+
+                print_queue = None
+                if solution is not None:
+                        path = [] # (key, operation code, cost) of the states of the solution, from the last one
+                        key = solution
+                        while key != root_key:
+                                inboxes[owner(key, workers)].put((TRACE, key))
+                                message = receive(master, processes)
+                                while message[0] != RECORD: # answers to the last probes may still be on the way
+                                        message = receive(master, processes)
+                                path.append((key, message[2], message[3]))
+                                key = message[1]
+                        node = root_state
+                        for (key, operation, cost) in reversed(path):
+                                node = root_state.rebuild(key, cost, operation, node)
+                        print_queue = node.backtrack_sol(root_state)[0]
+
+                for inbox in inboxes:
+                        inbox.put((STOP,))
+                finished = 0
+                while finished < workers:
+                        message = receive(master, processes)
+                        if message[0] == DONE:
+                                finished += 1
+                                stats.nodesExpanded += message[1]
+                                stats.nodesGenerated += message[2]
+        finally:
+                for process in processes:
+                        process.join(1)
+                        if process.is_alive():
+                                process.terminate()
+
+        if print_queue is None:
+                return finishSearch((None, None), stats, start)
+        return finishSearch((print_queue, incumbent), stats, start)
@@ -0,0 +1,151 @@
+"""
+Cache of solutions, keyed by the content of the yard rather than by its file: the same yard, goal cask and solver always give the same key, whatever the
+name of the file, the order of its lines or the ids of its edges. Solutions are kept in memory, up to a number of entries, and in a directory, up to a
+number of bytes; the least recently used ones are evicted first.
+
+usage: python plancache.py [directory] prints what the cache directory holds
+"""
+import collections
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "hcb-plans")
+
+def fingerprint(yard, goalCask, solver):
+        """
+        Returns the key of a problem: the sha256 of a canonical description of the yard (its casks, its stacks with their casks from bottom to top and
+        its edges, each sorted by id), of the goal cask and of the solver, a string that names the algorithm and the options that can change the solution
+        """
+        casks = sorted((cask_id, yard.caskLength[yard.caskIndex[cask_id]], repr(yard.caskWeight[yard.caskIndex[cask_id]])) for cask_id in yard.caskStack)
+        stacks = []
+        for (i, stack_id) in enumerate(yard.stackIds):
+                stack = yard.initialStacks[i // yard.blockSize][i % yard.blockSize]
+                stacks.append((stack_id, yard.stackSize[yard.nodeIndex[stack_id]], [yard.caskIds[cask] for cask in stack[1:]]))
+        edges = set()
+        for (node, neighbours) in enumerate(yard.adjacency):
+                for (neighbour, cost) in neighbours:
+                        edges.add(tuple(sorted((yard.nodeIds[node], yard.nodeIds[neighbour]))) + (repr(cost),))
+        description = {'casks': casks, 'stacks': sorted(stacks), 'edges': sorted(edges), 'goal': goalCask, 'solver': solver}
+        return hashlib.sha256(json.dumps(description, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+def solverName(algorithm, heuristic=None, macro=False, prune=False):
+        """
+        Returns the solver string of fingerprint: the algorithm, then its heuristic (left out for ucs, which doesn't use one), then the options that can
+        change which optimal plan is found. Every program that shares a cache directory builds it here, so that they find each other's plans
+        """
+        parts = [algorithm]
+        if algorithm != 'ucs':
+                parts.append(heuristic)
+        if macro:
+                parts.append('macro')
+        if prune:
+                parts.append('prune')
+        return "/".join(parts)
+
+class PlanCache:
+        """
+        Two-level cache of (print_queue, total_cost) solutions: an LRU dictionary of at most memoryEntries entries, and, if directory isn't None, one JSON
+        file per entry in directory, which holds at most diskBytes bytes. The modification time of a file is updated when it's read, so the disk level
+        evicts the least recently used files too. An unsolvable problem is cached as (None, None).
+        """
+        def __init__(self, directory=None, memoryEntries=256, diskBytes=64 * 1024 * 1024):
+                self.directory = directory
+                self.memoryEntries = memoryEntries
+                self.diskBytes = diskBytes
+                self.memory = collections.OrderedDict() # keys = fingerprints, values = (print_queue, total_cost), the most recently used last
+                self.counters = {'memoryHits': 0, 'diskHits': 0, 'misses': 0, 'stores': 0, 'memoryEvictions': 0, 'diskEvictions': 0}
+                if directory is not None:
+                        os.makedirs(directory, exist_ok=True)
+
+        def path(self, key):
+                return os.path.join(self.directory, key + ".json")
+
+        def get(self, key):
+                """
+                Returns the cached (print_queue, total_cost) for key, or None if there's none
+                """
+                if key in self.memory:
+                        self.memory.move_to_end(key)
+                        self.counters['memoryHits'] += 1
+                        return self.memory[key]
+                if self.directory is not None:
+                        try:
+                                with open(self.path(key)) as f:
+                                        entry = json.load(f)
+                                os.utime(self.path(key))
+                        except (IOError, OSError, ValueError): # missing, or evicted or damaged by another process
+                                entry = None
+                        if entry is not None:
+                                self.counters['diskHits'] += 1
+                                solution = (entry['plan'], entry['cost'])
+                                self.remember(key, solution)
+                                return solution
+                self.counters['misses'] += 1
+                return None
+
+        def put(self, key, print_queue, cost):
+                self.counters['stores'] += 1
+                self.remember(key, (print_queue, cost))
+                if self.directory is not None:
+                        (fd, temporary) = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                        with os.fdopen(fd, "w") as f:
+                                json.dump({'plan': print_queue, 'cost': cost}, f)
+                        os.replace(temporary, self.path(key)) # readers never see a partial file
+                        self.evict()
+
+        def remember(self, key, solution):
+                self.memory[key] = solution
+                self.memory.move_to_end(key)
+                while len(self.memory) > self.memoryEntries:
+                        self.memory.popitem(last=False)
+                        self.counters['memoryEvictions'] += 1
+
+        def entries(self):
+                """
+                Returns (modification time, size, path) of every file in the cache directory
+                """
+                files = []
+                for name in os.listdir(self.directory):
+                        if name.endswith(".json"):
+                                try:
+                                        status = os.stat(os.path.join(self.directory, name))
+                                        files.append((status.st_mtime, status.st_size, os.path.join(self.directory, name)))
+                                except OSError:
+                                        pass
+                return files
+
+        def evict(self):
+                """
+                Deletes the least recently used files until the directory holds at most diskBytes bytes
+                """
+                files = sorted(self.entries())
+                total = sum(size for (mtime, size, path) in files)
+                for (mtime, size, path) in files:
+                        if total <= self.diskBytes:
+                                break
+                        try:
+                                os.remove(path)
+                                self.counters['diskEvictions'] += 1
+                        except OSError:
+                                pass
+                        total -= size
+
+        def stats(self):
+                """
+                Returns the counters of this cache since it was created, with the number of entries in memory and the number and size of the files on disk
+                """
+                stats = dict(self.counters)
+                stats['memoryEntries'] = len(self.memory)
+                if self.directory is not None:
+                        files = self.entries()
+                        stats['diskEntries'] = len(files)
+                        stats['diskBytes'] = sum(size for (mtime, size, path) in files)
+                return stats
+
+if __name__ == "__main__":
+        cache = PlanCache(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIRECTORY)
+        stats = cache.stats()
+        print("{}: {} plans, {} bytes".format(cache.directory, stats['diskEntries'], stats['diskBytes']))
@@ -1,10 +1,93 @@
-from BinHeap import TupleBinHeap
+from BinHeap import TupleBinHeap, IndexedBinHeap
+from nodestore import NodeStore
+import heapq
+import json
+import resource
+import sys
+import time
+
+# fringe implementations that can be handed to uniformCost and AStar, selected by the --fringe option of informed.py and uninformed.py. They share
+# the interface insert((item, priority), key, g, h), improves(key, g), pop() -> (item, priority) and currentSize. TupleBinHeap keeps every copy of
+# a state it is given, IndexedBinHeap keeps only the best one.
+fringes = {'indexed': IndexedBinHeap, 'tuple': TupleBinHeap}
+
+# IDAStar: decimal digits kept in the values of (cost+heuristic) that are compared with the bound. The costs are sums of floats, so the same sum
+# added in a different order can differ in the last digits, and each of those values would otherwise cost an iteration of its own
+BOUND_DIGITS = 9
+
+class SearchStats:
+        """
+        Figures about a run of a search function, which every search function returns with the solution (see SearchResult)
+        """
+        def __init__(self):
+                self.nodesExpanded = 0 # nodes taken from the fringe and expanded
+                self.nodesGenerated = 0 # children returned by expand
+                self.duplicatesPruned = 0 # children dropped because their state was already explored or already reached with a smaller cost
+                self.peakFringeSize = 0
+                self.peakExploredSize = 0
+                self.peakTableSize = 0 # IDAStar: largest number of entries in the transposition table
+                self.peakDepth = 0 # IDAStar: longest path kept on the DFS stack
+                self.nodesStored = 0 # arenaSearch: number of nodes in the NodeStore
+                self.nodeLimitReached = False # arenaSearch: the search stopped because the NodeStore was full
+                self.deadlineReached = False # ARAStar: the search stopped at its deadline
+                self.peakRSS = 0 # peak resident set size of the process, in kilobytes
+                self.time = {'search': 0.0} # wall time in seconds. The search functions fill 'search', the problem may add other phases (e.g. 'parse')
+
+        def asDict(self):
+                return dict(self.__dict__)
+
+        def report(self, destination):
+                """
+                Writes the figures as text to stderr if destination is '-', or as JSON to the file named destination
+                """
+                if destination == '-':
+                        for (name, value) in sorted(self.__dict__.items()):
+                                if name != 'time':
+                                        sys.stderr.write("{}: {}\n".format(name, value))
+                        for (phase, seconds) in sorted(self.time.items()):
+                                sys.stderr.write("time {}: {:.6f} s\n".format(phase, seconds))
+                else:
+                        with open(destination, "w") as f:
+                                json.dump(self.asDict(), f, indent=2, sort_keys=True)
+
+class SearchHooks:
+        """
+        Callbacks the search functions call when they're given an instance of a subclass of this class. When they aren't given one, the only cost is
+        a check per expanded node.
+        """
+        def onPop(self, node): # node was taken from the fringe
+                pass
+
+        def onExpand(self, node, children): # node was expanded. children is the list of (child, cost) pairs that were added to the fringe
+                pass
+
+        def onGoal(self, node): # node is the solution that is going to be returned
+                pass
+
+class SearchResult(tuple):
+        """
+        What the search functions return: it unpacks as (print_queue, total_cost), and the stats of the search are in its stats field
+        """
+        def __new__(cls, print_queue, cost, stats):
+                result = tuple.__new__(cls, (print_queue, cost))
+                result.stats = stats
+                return result
+
+def finishSearch(solution, stats, start):
+        """
+        Records the figures that are only known at the end of a search and builds its SearchResult. solution is (print_queue, total_cost)
+        """
+        stats.time['search'] = time.perf_counter() - start
+        stats.peakRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return SearchResult(solution[0], solution[1], stats)
 
 class StateRepresentation:
         """
         This class is an "interface" for the representation of States on the search tree. It's independent of the problem. When defining the problem
         there should be a subclass of this, with implementations of the problem-specific behaviour, in particular the expand method.
         """
+        __slots__ = ('parent', 'operations')
+
         def __init__(self, parent, operations):
                 self.parent = parent
                 self.operations = operations
@@ -16,73 +99,438 @@ class StateRepresentation:
                 node = self
                 print_queue = []
                 while node != root:
-                        print_queue.append(node.getMoveDescription())
+                        print_queue.extend(reversed(node.getMoveDescriptions()))
                         node = node.parent
 
                 print_queue.reverse()
 
                 return (print_queue, self.cost)
 
+        def getMoveDescriptions(self):
+                """
+                Returns the lines that describe the operation that led to this node. By default it's the single line returned by getMoveDescription, which
+                the problem specific subclass has to implement; an operation that stands for several steps can be described by several lines.
+                """
+                return [self.getMoveDescription()]
+
         def expand(self):
                 """
                 This method is supposed to be implemented on the problem specific subclass implementation of this class. It is expected to return
                 the nodes to which the solver can go from this node.
                 """
                 pass
-def uniformCost(root_state):
+
+        def successors(self):
+                """
+                Yields (key, cost, build) for each node to which the solver can go from this node, where build() returns the node. uniformCost and AStar
+                only call build for the nodes that aren't pruned as duplicates, so the problem specific subclass should override this method to compute
+                the key and the cost without instantiating the node. By default the nodes are taken from expand.
+                """
+                for (child, child_cost) in self.expand():
+                        yield (child.__key__(), child_cost, lambda child=child: child)
+
+        def pack(self):
+                """
+                This method is supposed to be implemented on the problem specific subclass, if the state is to be used by the parallel search. It is expected
+                to return a picklable description of the state that doesn't reference the parent node nor the problem, from which unpack can rebuild it.
+                """
+                raise NotImplementedError
+
+        def unpack(self, packed):
+                """
+                This method is supposed to be implemented on the problem specific subclass, if the state is to be used by the parallel search. It is expected
+                to rebuild a state described by pack, in the same problem as this state.
+                """
+                raise NotImplementedError
+
+        def operationCode(self):
+                """
+                This method is supposed to be implemented on the problem specific subclass, if the state is to be used by arenaSearch. It is expected to
+                return an integer between 0 and 255 that stands for the operation that led to this state, 0 for the root.
+                """
+                raise NotImplementedError
+
+        def rebuild(self, key, cost, operation, parent):
+                """
+                This method is supposed to be implemented on the problem specific subclass, if the state is to be used by arenaSearch. It is expected to
+                return the state with the given key, in the same problem as this state, reached with the given cost by the operation whose code is
+                operation (see operationCode) from parent, which may be None.
+                """
+                raise NotImplementedError
+
+def uniformCost(root_state, fringe_class=IndexedBinHeap, stats=None, hooks=None):
         """
         This function implements the Uniform Cost algorithm. It is an uninformed search algorithm, so it only takes each node's cost into account.
         A fringe of possible operations is kept, ordered by cost. This fringe is implemented as a Binary Heap, enhancing performance and making it
         easy to keep track of the next node to be expanded. The node taken from the fringe is always the one with the smallest cost available.
         The new node is checked to see if it is a solution and in that case the algorithm is halted and the solution is returned. 
-        In the case that the new node isn't a solution, its operations are explored and put inserted into the fringe.
+        In the case that the new node isn't a solution, its operations are explored and put inserted into the fringe. Only the children that aren't
+        duplicates are instantiated (see StateRepresentation.successors).
+        By default the fringe is an IndexedBinHeap, so a state that is already on the fringe is only updated when it's reached with a smaller cost.
+
+        The figures of the search are recorded in stats (a new SearchStats if it's None), and hooks, if given, is a SearchHooks.
 
-        returns (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution
+        returns (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution, as a SearchResult
         """
-        fringe = TupleBinHeap() # fringe of available nodes to expand, where the first to come out is the one with the smaller cost
+        start = time.perf_counter()
+        if stats is None:
+                stats = SearchStats()
+        fringe = fringe_class() # fringe of available nodes to expand, where the first to come out is the one with the smaller cost
         explored = set() 
-        fringe.insert((root_state,0))
+        fringe.insert((root_state,0), root_state.__key__(), 0)
         while fringe.currentSize != 0:
 
                 cur_node = fringe.pop()[0]  # get cheapest node to visit from the fringe
+                cur_key = cur_node.__key__()
+                if cur_key in explored: # stale copy of a state that was already expanded (only happens with fringes that keep duplicates)
+                        continue
+                if hooks is not None:
+                        hooks.onPop(cur_node)
 
                 if cur_node.checksol(): # check if the state is a solution to the problem
-                        return cur_node.backtrack_sol(root_state)
+                        if hooks is not None:
+                                hooks.onGoal(cur_node)
+                        stats.peakExploredSize = len(explored)
+                        return finishSearch(cur_node.backtrack_sol(root_state), stats, start)
 
-                explored.add(cur_node.__key__())
-                for (child, child_cost) in cur_node.expand():
-                        if child.__key__() not in explored:
-                                fringe.insert((child,child_cost))
+                explored.add(cur_key)
+                stats.nodesExpanded += 1
+                children = [] if hooks is not None else None
+                for (child_key, child_cost, build) in cur_node.successors():
+                        stats.nodesGenerated += 1
+                        if child_key in explored or not fringe.improves(child_key, child_cost):
+                                stats.duplicatesPruned += 1
+                                continue
+                        child = build()
+                        fringe.insert((child,child_cost), child_key, child_cost)
+                        if children is not None:
+                                children.append((child, child_cost))
+                if hooks is not None:
+                        hooks.onExpand(cur_node, children)
+                if fringe.currentSize > stats.peakFringeSize:
+                        stats.peakFringeSize = fringe.currentSize
 
 
-        return None, None
+        stats.peakExploredSize = len(explored)
+        return finishSearch((None, None), stats, start)
 
-def AStar(root_state):
+def AStar(root_state, fringe_class=IndexedBinHeap, stats=None, hooks=None):
         """
         This function implements the AStar algorithm. It is an informed search algorithm, so it takes each node's cost and the result of an heuristic 
         into account. A fringe of possible operations is kept, ordered by each node's value of (cost+heuristic). 
         The node taken from the fringe is always the one with the smallest value available for (cost+heuristic).
         The new node is checked to see if it is a solution and in that case the algorithm is halted and the solution is returned. 
         In the case that the new node isn't a solution, its operations are explored and put inserted into the fringe.
+        Only the children that aren't duplicates are instantiated (see StateRepresentation.successors).
+        Ties on (cost+heuristic) are broken in favour of the node with the smaller heuristic when the fringe is an IndexedBinHeap.
+
+        The figures of the search are recorded in stats (a new SearchStats if it's None), and hooks, if given, is a SearchHooks.
 
-        returns (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution
+        returns (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution, as a SearchResult
 
         """
-        fringe = TupleBinHeap() # fringe of available nodes to expand, where the first to come out is the one with the smaller cost
+        start = time.perf_counter()
+        if stats is None:
+                stats = SearchStats()
+        fringe = fringe_class() # fringe of available nodes to expand, where the first to come out is the one with the smaller cost
         explored = set() 
-        fringe.insert((root_state,0))
+        fringe.insert((root_state,0), root_state.__key__(), 0)
         while fringe.currentSize != 0:
 
                 cur_node = fringe.pop()[0]  # get cheapest node to visit from the fringe
+                cur_key = cur_node.__key__()
+                if cur_key in explored: # stale copy of a state that was already expanded (only happens with fringes that keep duplicates)
+                        continue
+                if hooks is not None:
+                        hooks.onPop(cur_node)
 
                 if cur_node.checksol(): # check if the state is a solution to the problem
-                        return cur_node.backtrack_sol(root_state)
+                        if hooks is not None:
+                                hooks.onGoal(cur_node)
+                        stats.peakExploredSize = len(explored)
+                        return finishSearch(cur_node.backtrack_sol(root_state), stats, start)
+
+
+                explored.add(cur_key)
+                stats.nodesExpanded += 1
+                children = [] if hooks is not None else None
+                for (child_key, child_cost, build) in cur_node.successors():
+                        stats.nodesGenerated += 1
+                        if child_key in explored or not fringe.improves(child_key, child_cost):
+                                stats.duplicatesPruned += 1
+                                continue
+                        child = build()
+                        h = child.heuristic()
+                        fringe.insert((child,child_cost+h), child_key, child_cost, h)
+                        if children is not None:
+                                children.append((child, child_cost))
+                if hooks is not None:
+                        hooks.onExpand(cur_node, children)
+                if fringe.currentSize > stats.peakFringeSize:
+                        stats.peakFringeSize = fringe.currentSize
+
+
+        stats.peakExploredSize = len(explored)
+        return finishSearch((None, None), stats, start)
+
+def ARAStar(root_state, weight=2.0, deadline=None, step=0.5, stats=None, hooks=None):
+        """
+        This function implements the Anytime Repairing AStar algorithm. It is a generator: it yields a first solution found by a weighted AStar, where
+        nodes are ordered by (cost + weight*heuristic), and then better ones as it lowers the weight by step, reusing the work done with the previous
+        weights: the states whose cost drops after they were expanded are kept aside and put back in the fringe, with the new weight, for the next iteration.
+        Nodes whose value of (cost+heuristic) isn't smaller than the cost of the best solution found are pruned.
+        Each solution comes with a bound on its suboptimality: its cost is at most bound times the optimal cost (as long as the heuristic is admissible).
+        The search stops when the weight reaches 1, which gives an optimal solution, or after deadline seconds; in that case, a solution found during the
+        last iteration is still yielded, with the bound of the previous one, and stats.deadlineReached is set (when no solution was found by then,
+        the generator yields nothing, as when there's no solution).
+        The figures of the search are recorded in stats (a new SearchStats if it's None), which every solution shares, and hooks, if given, is a SearchHooks
+        whose onPop is called for each node taken from the fringe.
+
+        yields (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution, as a SearchResult
+        with the extra fields bound and weight
+        """
+        start = time.perf_counter()
+        if stats is None:
+                stats = SearchStats()
+        stop = None if deadline is None else start + deadline
+
+        def solution(node, bound):
+                result = finishSearch(node.backtrack_sol(root_state), stats, start)
+                result.bound = bound
+                result.weight = weight
+                return result
+
+        if root_state.checksol():
+                yield solution(root_state, 1.0)
+                return
+
+        root_key = root_state.__key__()
+        g = {root_key: 0} # keys = state keys, values = smallest cost with which the state was reached
+        heuristics = {root_key: root_state.heuristic()} # keys = state keys, values = heuristic of the state, which doesn't change with the weight
+        fringe = IndexedBinHeap()
+        fringe.insert((root_state, weight * heuristics[root_key]), root_key, 0, heuristics[root_key])
+        inconsistent = dict() # keys = state keys, values = states whose cost dropped after they were expanded in this iteration
+        incumbent = None # best solution found
+        reported = None # (cost, bound) of the last solution yielded
+        while True:
+                closed = set()
+                while fringe.currentSize != 0 and (incumbent is None or fringe.top()[1] < incumbent.cost):
+                        if stop is not None and time.perf_counter() > stop:
+                                stats.deadlineReached = True
+                                if incumbent is None:
+                                        finishSearch((None, None), stats, start)
+                                elif reported is None or incumbent.cost < reported[0]:
+                                        yield solution(incumbent, None if reported is None else reported[1])
+                                return
+                        cur_node = fringe.pop()[0]
+                        if hooks is not None:
+                                hooks.onPop(cur_node)
+                        closed.add(cur_node.__key__())
+                        stats.nodesExpanded += 1
+                        for (child_key, child_cost, build) in cur_node.successors():
+                                stats.nodesGenerated += 1
+                                if child_cost >= g.get(child_key, float('inf')):
+                                        stats.duplicatesPruned += 1
+                                        continue
+                                g[child_key] = child_cost
+                                child = build()
+                                if child.checksol():
+                                        if incumbent is None or child_cost < incumbent.cost:
+                                                incumbent = child
+                                        continue
+                                h = heuristics.get(child_key)
+                                if h is None:
+                                        h = heuristics[child_key] = child.heuristic()
+                                if incumbent is not None and child_cost + h >= incumbent.cost:
+                                        continue
+                                if child_key in closed:
+                                        inconsistent[child_key] = child
+                                else:
+                                        fringe.insert((child, child_cost + weight * h), child_key, child_cost, h)
+                        if fringe.currentSize > stats.peakFringeSize:
+                                stats.peakFringeSize = fringe.currentSize
+
+                # the states that are left are the ones that may still lead to a better solution. The smallest value of (cost+heuristic) among them is
+                # a lower bound of the cost of the optimal solution
+                waiting = [entry[4] for entry in fringe.heapList[1:]] + list(inconsistent.values())
+                if incumbent is None:
+                        if not waiting: # there's no solution: the generator yields nothing
+                                finishSearch((None, None), stats, start)
+                                return
+                        bound = weight
+                else:
+                        lower = min([node.cost + heuristics[node.__key__()] for node in waiting] or [incumbent.cost])
+                        bound = max(1.0, min(weight, incumbent.cost / lower)) if lower > 0 else weight
+                        if reported is None or incumbent.cost < reported[0] or bound < reported[1]:
+                                reported = (incumbent.cost, bound)
+                                yield solution(incumbent, bound)
+                        if bound <= 1.0:
+                                return
+
+                weight = max(1.0, min(weight - step, bound))
+                fringe = IndexedBinHeap()
+                for node in waiting:
+                        key = node.__key__()
+                        fringe.insert((node, node.cost + weight * heuristics[key]), key, node.cost, heuristics[key])
+                inconsistent.clear()
+
+def arenaSearch(root_state, informed=True, nodeLimit=None, stats=None, hooks=None):
+        """
+        This function implements AStar, or Uniform Cost if informed is False, with the nodes kept in a NodeStore instead of as state objects that
+        reference their parents: each node is a row of typed arrays, the fringe only holds node indices, and the states are rebuilt from their keys when
+        they're expanded. The children are built to compute their heuristic and dropped right away. The nodes are expanded in the same order as with
+        AStar (or uniformCost) and an IndexedBinHeap, so the solution is the same.
+        When nodeLimit isn't None, the store holds at most nodeLimit nodes; when a new state would have to be stored in a full store, the search stops
+        without a solution and sets stats.nodeLimitReached.
+
+        The figures of the search are recorded in stats (a new SearchStats if it's None), and hooks, if given, is a SearchHooks.
+
+        returns (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution, as a SearchResult
+        """
+        start = time.perf_counter()
+        if stats is None:
+                stats = SearchStats()
+        store = NodeStore(root_state, nodeLimit)
+        fringe = [(0, 0, 0, 0)] # heap of (priority, h, order, node index). An entry whose priority doesn't match the g of its node is stale
+        counter = 1
+        open_nodes = 1 # nodes on the fringe, without the stale entries
+        while fringe:
+                (priority, h, order, i) = heapq.heappop(fringe)
+                if store.closed[i] or priority != store.g[i] + h:
+                        continue
+                store.closed[i] = 1
+                open_nodes -= 1
+                cur_node = store.state(i)
+                if hooks is not None:
+                        hooks.onPop(cur_node)
+
+                if cur_node.checksol():
+                        if hooks is not None:
+                                hooks.onGoal(cur_node)
+                        stats.nodesStored = len(store)
+                        stats.peakExploredSize = stats.nodesExpanded
+                        return finishSearch(store.backtrack_sol(i), stats, start)
+
+                stats.nodesExpanded += 1
+                children = [] if hooks is not None else None
+                for (child_key, child_cost, build) in cur_node.successors():
+                        stats.nodesGenerated += 1
+                        j = store.index.get(child_key)
+                        if j is not None and (store.closed[j] or store.g[j] <= child_cost):
+                                stats.duplicatesPruned += 1
+                                continue
+                        child = build()
+                        if j is None:
+                                j = store.add(child_key, child_cost, i, child.operationCode())
+                                if j is None:
+                                        stats.nodeLimitReached = True
+                                        stats.nodesStored = len(store)
+                                        stats.peakExploredSize = stats.nodesExpanded
+                                        return finishSearch((None, None), stats, start)
+                                open_nodes += 1
+                        else:
+                                store.update(j, child_cost, i, child.operationCode())
+                        child_h = child.heuristic() if informed else 0
+                        heapq.heappush(fringe, (child_cost + child_h, child_h, counter, j))
+                        counter += 1
+                        if children is not None:
+                                children.append((child, child_cost))
+                if hooks is not None:
+                        hooks.onExpand(cur_node, children)
+                if open_nodes > stats.peakFringeSize:
+                        stats.peakFringeSize = open_nodes
+
+        stats.nodesStored = len(store)
+        stats.peakExploredSize = stats.nodesExpanded
+        return finishSearch((None, None), stats, start)
+
+def childrenByF(node, stats):
+        """
+        Expands node and returns an iterator over (f, cost, child) for each child, with the most promising children first; f is rounded to
+        BOUND_DIGITS decimal digits. Used by IDAStar
+        """
+        children = node.expand()
+        stats.nodesExpanded += 1
+        stats.nodesGenerated += len(children)
+        ordered = [(round(child_cost + child.heuristic(), BOUND_DIGITS), i, child_cost, child) for (i, (child, child_cost)) in enumerate(children)]
+        ordered.sort()
+        return iter([(f, child_cost, child) for (f, i, child_cost, child) in ordered])
+
+def IDAStar(root_state, tableSize=1000000, stats=None):
+        """
+        This function implements the Iterative Deepening AStar algorithm, a memory-bounded alternative to AStar. Each iteration is a depth-first
+        search that prunes the nodes whose value of (cost+heuristic) exceeds a bound; the next iteration uses the smallest value that was pruned.
+        Only the current path is kept, plus a transposition table that holds the smallest cost with which each state was reached in the current
+        iteration. The table holds at most tableSize states: when it is full, new states are no longer recorded (so they may be searched again).
+        The states pruned by the bound are recorded too, up to tableSize of them, so that an iteration in which nothing overflowed can tell whether
+        the next one would reach any new state; when it wouldn't, the search stops without a solution.
+        As long as the heuristic is admissible, the solution found is optimal, with the same cost AStar would return.
+        The figures of the search, among which the peak table size, path length and RSS, are recorded in stats (a new SearchStats if it's None).
+
+        returns (print_queue, total_cost) where print_queue is a list of strings, each containing the operations involved in the solution, as a SearchResult
+        """
+        start = time.perf_counter()
+        if stats is None:
+                stats = SearchStats()
+        if root_state.checksol():
+                return finishSearch(root_state.backtrack_sol(root_state), stats, start)
+
+        bound = root_state.heuristic()
+        table = dict() # transposition table: keys = state keys, values = smallest cost with which the state was reached in this iteration
+        frontier = dict() # keys = keys of the states pruned by the bound in this iteration, values = (cost, f) of their cheapest pruned copy
+        while bound != float('inf'):
+                next_bound = float('inf')
+                overflowed = False # some state couldn't be recorded in the table or in the frontier
+                table.clear()
+                frontier.clear()
+                root_key = root_state.__key__()
+                path = [root_key] # keys of the nodes on the current path, which can't be visited again
+                on_path = set(path)
+                stack = [childrenByF(root_state, stats)]
+                while stack:
+                        try:
+                                (f, child_cost, child) = next(stack[-1])
+                        except StopIteration:
+                                stack.pop()
+                                on_path.discard(path.pop())
+                                continue
+
+                        child_key = child.__key__()
+                        if child_key in on_path:
+                                continue
+                        seen = table.get(child_key)
+                        if seen is not None and seen <= child_cost: # checked before the bound, so that a dominated copy doesn't lower the next bound
+                                stats.duplicatesPruned += 1
+                                continue
+                        if f > bound:
+                                next_bound = min(next_bound, f)
+                                pruned = frontier.get(child_key)
+                                if pruned is not None:
+                                        if child_cost < pruned[0]:
+                                                frontier[child_key] = (child_cost, f)
+                                elif len(frontier) < tableSize:
+                                        frontier[child_key] = (child_cost, f)
+                                else:
+                                        overflowed = True
+                                continue
+                        if seen is not None or len(table) < tableSize:
+                                table[child_key] = child_cost
+                        else:
+                                overflowed = True
 
+                        if child.checksol():
+                                return finishSearch(child.backtrack_sol(root_state), stats, start)
 
-                explored.add(cur_node.__key__())
-                for (child, child_cost) in cur_node.expand():
-                        if child.__key__() not in explored:
-                                fringe.insert((child,child_cost+child.heuristic()))
+                        path.append(child_key)
+                        on_path.add(child_key)
+                        stack.append(childrenByF(child, stats))
+                        stats.peakDepth = max(stats.peakDepth, len(path))
+                        stats.peakTableSize = max(stats.peakTableSize, len(table))
 
+                if not overflowed:
+                        # every state searched is in the table, so only the pruned states that it doesn't hold with a cost at least as small can lead
+                        # to new states. When there are none, the next iteration wouldn't reach any new state: there's no solution
+                        next_bound = min([f for (key, (cost, f)) in frontier.items() if table.get(key, float('inf')) > cost] or [float('inf')])
+                bound = next_bound
 
-        return None, None
+        return finishSearch((None, None), stats, start)
@@ -0,0 +1,324 @@
+"""
+Long-lived solver service. It listens on a Unix socket or on a localhost TCP port and answers solve requests, so that the interpreter startup, the parsing
+of the yards and their shortest path tables are paid once instead of once per problem. The searches run on a pool of worker processes, each of which
+keeps the yards it has read, and their shortest path tables, in memory; the yards given with --preload are read before the pool is forked, so every
+worker starts with them.
+
+usage: python service.py (--socket PATH | --port N) [--workers N] [--preload file ...] [--cache] [--plan-cache [DIR]]
+
+The protocol is one JSON object per line, in both directions. Requests are handled concurrently, and their answers are sent as they finish, with the id
+of the request:
+        {"id": 1, "file": "yard.txt", "goal": "C1", "algorithm": "astar", "heuristic": "blocking", "macro": false, "prune": false, "deadline": 2.5}
+                -> {"id": 1, "plan": [...], "cost": 12.0, "stats": {...}} or {"id": 1, "error": "..."}
+           algorithm is astar (the default), ucs or anytime (ARA*, which answers with the best plan found by the deadline, and its "bound"; "weight" sets
+           its first weight). prune sets the relevance pruning (see HCB.analyseRelevance). deadline, in seconds from when the request is received, is
+           optional. A request that isn't answered by then fails, and so does an anytime request that has no plan by then.
+        {"cancel": 1} -> {"cancel": 1, "found": true}: stops the request with id 1 of the same connection, which fails. found is false, and nothing
+           happens, when that request isn't waiting for a worker nor running
+        {"stats": true} -> {"stats": {...}}: counters of the service
+Closing the connection cancels the requests of that connection that are still waiting or running.
+"""
+from search import *
+from HCB import *
+from plancache import PlanCache, fingerprint, solverName, DEFAULT_DIRECTORY
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+GRACE = 1.0 # seconds a worker gets after the deadline of its request to answer, before it's killed and replaced
+CHECK_EVERY = 256 # nodes taken from the fringe between two checks of the deadline and of the cancellation of a request
+
+yards = dict() # keys = file names, values = (modification time, size, Yard). The yards of a worker; the preloaded ones are inherited from the service
+
+class Interrupted(Exception):
+        pass
+
+class Interrupter(SearchHooks):
+        """
+        Stops the search of a request when its deadline passes or when the service cancels it, by setting the entry of the worker in the shared
+        cancelled array to the sequence number of the request
+        """
+        def __init__(self, deadline, cancelled, slot, sequence):
+                self.deadline = deadline
+                self.cancelled = cancelled
+                self.slot = slot
+                self.sequence = sequence
+                self.count = 0
+
+        def onPop(self, node):
+                self.count += 1
+                if self.count % CHECK_EVERY == 0:
+                        self.check()
+
+        def check(self):
+                if self.cancelled[self.slot] == self.sequence:
+                        raise Interrupted("cancelled")
+                if self.deadline is not None and time.monotonic() > self.deadline:
+                        raise Interrupted("deadline exceeded")
+
+def warmYard(filename, compiled):
+        """
+        Returns the Yard of a file, reading it only if it isn't in memory or if the file changed since it was read
+        """
+        status = os.stat(filename)
+        entry = yards.get(filename)
+        if entry is None or entry[0] != status.st_mtime_ns or entry[1] != status.st_size:
+                entry = (status.st_mtime_ns, status.st_size, Yard(filename, compiled))
+                yards[filename] = entry
+        return entry[2]
+
+def runRequest(request, slot, sequence, deadline, cancelled, cache, compiled):
+        """
+        Solves one request in a worker. Any error only fails this request
+        """
+        response = {'id': request.get('id')}
+        try:
+                algorithm = request.get('algorithm', 'astar')
+                if algorithm not in ('astar', 'ucs', 'anytime'):
+                        raise ValueError("unknown algorithm: {}".format(algorithm))
+                heuristic = request.get('heuristic', 'blocking')
+                macro = bool(request.get('macro', False))
+                prune = bool(request.get('prune', False))
+                yard = warmYard(request['file'], compiled)
+                hcb = HCB(yard, request['goal'], algorithm != 'ucs', heuristic=heuristic, macro=macro, prune=prune)
+                key = None
+                if algorithm != 'anytime' or deadline is None: # with a deadline, the anytime solution depends on the machine
+                        key = fingerprint(hcb, request['goal'], solverName(algorithm, heuristic, macro, prune))
+                        cached = cache.get(key)
+                        if cached is not None:
+                                response['plan'], response['cost'] = cached
+                                response['stats'] = {'planCache': 'hit'}
+                                return response
+
+                hooks = Interrupter(deadline if algorithm != 'anytime' else None, cancelled, slot, sequence) # ARAStar stops by itself at the deadline
+                stats = SearchStats()
+                if algorithm == 'astar':
+                        result = AStar(hcb.initial_state, stats=stats, hooks=hooks)
+                elif algorithm == 'ucs':
+                        result = uniformCost(hcb.initial_state, stats=stats, hooks=hooks)
+                else:
+                        result = SearchResult(None, None, stats)
+                        result.bound = None
+                        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                        for result in ARAStar(hcb.initial_state, float(request.get('weight', 2.0)), remaining, stats=stats, hooks=hooks):
+                                pass
+                        if stats.deadlineReached and result[1] is None:
+                                raise Interrupted("deadline exceeded")
+                        response['bound'] = result.bound
+                hcb.recordTimes(stats)
+                if key is not None:
+                        cache.put(key, result[0], result[1])
+                response['plan'] = result[0]
+                response['cost'] = result[1]
+                response['stats'] = stats.asDict()
+        except Interrupted as e:
+                response['error'] = str(e)
+        except Exception as e:
+                response['error'] = "{}: {}".format(type(e).__name__, e)
+        return response
+
+def runWorker(slot, connection, cancelled, planCache, compiled):
+        """
+        Main loop of a worker process: answers the (sequence, request, deadline) messages it's sent until its pipe is closed
+        """
+        cache = PlanCache(planCache)
+        while True:
+                try:
+                        message = connection.recv()
+                except EOFError:
+                        return
+                (sequence, request, deadline) = message
+                connection.send(runRequest(request, slot, sequence, deadline, cancelled, cache, compiled))
+
+class Service:
+        """
+        Dispatches the requests to the workers: a request waits for an idle worker, is sent to it through its pipe, and its answer is awaited in a thread,
+        so that the event loop keeps handling the other requests. A worker that doesn't answer by the deadline of its request (plus GRACE) is killed and
+        replaced.
+        """
+        def __init__(self, workers, planCache, compiled):
+                self.context = multiprocessing.get_context('fork')
+                self.planCache = planCache
+                self.compiled = compiled
+                self.cancelled = self.context.RawArray('q', workers) # for each worker, the sequence number of the request to cancel
+                self.workers = [None] * workers # (process, pipe) of each worker
+                self.idle = asyncio.Queue()
+                for slot in range(0, workers):
+                        self.spawn(slot)
+                        self.idle.put_nowait(slot)
+                self.running = dict() # keys = (connection, request id), values = (worker, sequence number)
+                self.queued = set() # (connection, request id) of the requests waiting for a worker
+                self.cancelRequested = set() # (connection, request id) of the requests cancelled before they got a worker
+                self.sequence = 0
+                self.connections = 0
+                self.counters = {'requests': 0, 'solved': 0, 'failed': 0, 'cancelled': 0, 'deadlineExceeded': 0, 'workersReplaced': 0}
+
+        def spawn(self, slot):
+                (parent, child) = self.context.Pipe()
+                process = self.context.Process(target=runWorker, args=(slot, child, self.cancelled, self.planCache, self.compiled), daemon=True)
+                process.start()
+                child.close()
+                self.workers[slot] = (process, parent)
+
+        def replace(self, slot):
+                (process, pipe) = self.workers[slot]
+                process.kill()
+                process.join()
+                pipe.close()
+                self.spawn(slot)
+                self.counters['workersReplaced'] += 1
+
+        def cancel(self, name):
+                """
+                Cancels the request with the given (connection, request id). Returns False, without doing anything, if there's no such request waiting
+                for a worker or running
+                """
+                if name in self.running:
+                        (slot, sequence) = self.running[name]
+                        self.cancelled[slot] = sequence
+                        return True
+                if name in self.queued:
+                        self.cancelRequested.add(name)
+                        return True
+                return False
+
+        async def solve(self, connection, request):
+                name = (connection, request.get('id'))
+                try:
+                        received = time.monotonic()
+                        deadline = None if request.get('deadline') is None else received + float(request['deadline'])
+                        self.sequence += 1
+                        sequence = self.sequence
+                        self.counters['requests'] += 1
+                        slot = await self.idle.get()
+                finally:
+                        self.queued.discard(name) # handle added it
+                try:
+                        if name in self.cancelRequested:
+                                self.cancelRequested.discard(name)
+                                return {'id': request.get('id'), 'error': "cancelled"}
+                        if deadline is not None and time.monotonic() > deadline:
+                                return {'id': request.get('id'), 'error': "deadline exceeded"}
+                        self.running[name] = (slot, sequence)
+                        (process, pipe) = self.workers[slot]
+                        pipe.send((sequence, request, deadline))
+                        timeout = None if deadline is None else max(0.0, deadline - time.monotonic()) + GRACE
+                        try:
+                                return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(None, pipe.recv), timeout)
+                        except asyncio.TimeoutError:
+                                self.replace(slot)
+                                return {'id': request.get('id'), 'error': "deadline exceeded"}
+                        except (EOFError, OSError) as e:
+                                self.replace(slot)
+                                return {'id': request.get('id'), 'error': "worker failed: {}".format(type(e).__name__)}
+                finally:
+                        self.running.pop(name, None)
+                        self.idle.put_nowait(slot)
+
+        async def answer(self, connection, request, writer, lock):
+                response = await self.solve(connection, request)
+                error = response.get('error')
+                if error is None:
+                        self.counters['solved'] += 1
+                elif error == "cancelled":
+                        self.counters['cancelled'] += 1
+                elif error == "deadline exceeded":
+                        self.counters['deadlineExceeded'] += 1
+                else:
+                        self.counters['failed'] += 1
+                await self.send(writer, lock, response)
+
+        async def send(self, writer, lock, response):
+                async with lock:
+                        try:
+                                writer.write((json.dumps(response) + "\n").encode())
+                                await writer.drain()
+                        except (ConnectionError, RuntimeError): # the client went away: the answer is dropped
+                                pass
+
+        async def handle(self, reader, writer):
+                """
+                Serves one connection: each line is a request, answered by a task of its own
+                """
+                self.connections += 1
+                connection = self.connections
+                lock = asyncio.Lock()
+                tasks = set()
+                while True:
+                        try:
+                                line = await reader.readline()
+                        except (ConnectionError, ValueError):
+                                break
+                        if not line:
+                                break
+                        try:
+                                request = json.loads(line)
+                                if not isinstance(request, dict):
+                                        raise ValueError("a request is a JSON object")
+                        except ValueError as e:
+                                await self.send(writer, lock, {'error': "bad request: {}".format(e)})
+                                continue
+                        if 'cancel' in request:
+                                await self.send(writer, lock, {'cancel': request['cancel'], 'found': self.cancel((connection, request['cancel']))})
+                        elif request.get('stats'):
+                                await self.send(writer, lock, {'stats': dict(self.counters, workers=len(self.workers), running=len(self.running))})
+                        else:
+                                self.queued.add((connection, request.get('id'))) # right away, so that a cancel on the next line finds it
+                                task = asyncio.ensure_future(self.answer(connection, request, writer, lock))
+                                tasks.add(task)
+                                task.add_done_callback(tasks.discard)
+                for name in [name for name in list(self.running) + list(self.queued) if name[0] == connection]:
+                        self.cancel(name)
+                if tasks:
+                        await asyncio.gather(*tasks)
+                self.cancelRequested = set(name for name in self.cancelRequested if name[0] != connection)
+                writer.close()
+
+def preload(filenames, compiled):
+        """
+        Reads yards, and the shortest path tables of their EXIT, before the workers are forked, so that they all start with them
+        """
+        for filename in filenames:
+                yard = warmYard(filename, compiled)
+                yard.distances.fromSource(yard.exit)
+                if compiled:
+                        yard.updateCache()
+
+async def serve(args):
+        service = Service(args.workers, args.plan_cache, args.cache)
+        if args.socket is not None:
+                server = await asyncio.start_unix_server(service.handle, path=args.socket)
+        else:
+                server = await asyncio.start_server(service.handle, host='127.0.0.1', port=args.port)
+        sys.stderr.write("listening on {}\n".format(args.socket if args.socket is not None else "127.0.0.1:{}".format(args.port)))
+        async with server:
+                await server.serve_forever()
+
+def main(argv):
+        parser = argparse.ArgumentParser(description="Serves HCB solve requests on a socket")
+        where = parser.add_mutually_exclusive_group(required=True)
+        where.add_argument("--socket", default=None, help="path of the Unix socket to listen on")
+        where.add_argument("--port", type=int, default=None, help="localhost TCP port to listen on")
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="number of worker processes (default: one per CPU)")
+        parser.add_argument("--preload", nargs='*', default=[], metavar='FILE', help="yard files to read before starting the workers")
+        parser.add_argument("--cache", action='store_true', help="keep the yards in compiled cache files next to them, and load them from there when they're up to date")
+        parser.add_argument("--plan-cache", nargs='?', const=DEFAULT_DIRECTORY, default=None, metavar='DIR', help="also keep the plans in DIR (they're always kept in the memory of each worker)")
+        args = parser.parse_args(argv)
+
+        preload(args.preload, args.cache)
+        if args.socket is not None and os.path.exists(args.socket):
+                os.remove(args.socket)
+        try:
+                asyncio.run(serve(args))
+        except KeyboardInterrupt:
+                pass
+        finally:
+                if args.socket is not None and os.path.exists(args.socket):
+                        os.remove(args.socket)
+
+if __name__ == "__main__":
+        main(sys.argv[1:])
@@ -0,0 +1,161 @@
+import heapq
+import time
+
+try:
+        import numpy
+except ImportError:
+        numpy = None
+
+INFINITY = float('inf')
+
+def dijkstra(adjacency, source):
+        """
+        Heap-based implementation of dijkstra's algorithm on the interned HCB graph. adjacency[i] is a tuple of (neighbour, edge cost) pairs.
+        returns (costs, prev) where costs[i] is the cost of the shortest path between source and i (INFINITY if there's none) and prev[i] is
+        the node before i on that path (None for the source and for unreachable nodes)
+        """
+        costs = [INFINITY] * len(adjacency)
+        prev = [None] * len(adjacency)
+        costs[source] = 0
+        settle(adjacency, costs, prev, [(0, source)])
+        return costs, prev
+
+def settle(adjacency, costs, prev, heap):
+        """
+        Main loop of dijkstra's algorithm: settles the nodes on the heap, of (cost, node) pairs, and every node whose cost they lower, updating costs and prev
+        """
+        while heap:
+                (cost, node) = heapq.heappop(heap)
+                if cost > costs[node]: # stale entry, node was already settled with a smaller cost
+                        continue
+                for (neighbour, edge) in adjacency[node]:
+                        weight = cost + edge
+                        if weight < costs[neighbour]:
+                                costs[neighbour] = weight
+                                prev[neighbour] = node
+                                heapq.heappush(heap, (weight, neighbour))
+
+def repair(adjacency, costs, prev, a, b, old, new):
+        """
+        Updates in place the (costs, prev) tables of a single source after the cost of the edge between a and b changed from old to new, which is already
+        in adjacency. When the edge gets cheaper, only the nodes whose cost it lowers are visited. When it gets more expensive, only the nodes whose shortest
+        path used it (the subtree under it in the tree of shortest paths) are reset, and then settled again from their neighbours outside the subtree.
+        """
+        heap = []
+        if new < old:
+                for (u, v) in ((a, b), (b, a)):
+                        if costs[u] + new < costs[v]:
+                                costs[v] = costs[u] + new
+                                prev[v] = u
+                                heap.append((costs[v], v))
+        elif new > old:
+                children = [[] for node in costs]
+                for (node, parent) in enumerate(prev):
+                        if parent is not None:
+                                children[parent].append(node)
+                affected = [v for (u, v) in ((a, b), (b, a)) if prev[v] == u]
+                for node in affected: # the list grows with the subtree as it's walked
+                        affected.extend(children[node])
+                for node in affected:
+                        costs[node] = INFINITY
+                        prev[node] = None
+                for node in affected:
+                        for (neighbour, edge) in adjacency[node]:
+                                if costs[neighbour] + edge < costs[node]:
+                                        costs[node] = costs[neighbour] + edge
+                                        prev[node] = neighbour
+                        if costs[node] != INFINITY:
+                                heap.append((costs[node], node))
+        heapq.heapify(heap)
+        settle(adjacency, costs, prev, heap)
+
+class ShortestPaths:
+        """
+        Shortest paths between nodes of the HCB graph. Single-source tables are computed lazily, the first time they're asked for, and then kept.
+        The graph is undirected, so fromSource(t)[0][s] is also the cost of going from s to t; the heuristics only need the tables of the goal
+        stack and of the EXIT. allPairs() computes the full table for callers that need it.
+        """
+        def __init__(self, adjacency):
+                self.adjacency = adjacency
+                self.tables = dict() # keys = source nodes, values = (costs, prev) as returned by dijkstra
+                self.time = 0.0 # seconds spent computing shortest paths
+
+        def fromSource(self, source):
+                table = self.tables.get(source)
+                if table is None:
+                        start = time.perf_counter()
+                        table = dijkstra(self.adjacency, source)
+                        self.tables[source] = table
+                        self.time += time.perf_counter() - start
+                return table
+
+        def distancesFrom(self, source):
+                return self.fromSource(source)[0]
+
+        def distance(self, a, b):
+                return self.distancesFrom(b)[a]
+
+        def updateEdge(self, a, b, cost):
+                """
+                Sets the cost of the edge between nodes a and b (adding the edge if there's none) and repairs every table that was computed.
+                Returns the previous cost of the edge (INFINITY if there was none)
+                """
+                old = INFINITY
+                for (u, v) in ((a, b), (b, a)): # the graph has at most one edge between two nodes (see Yard.parse)
+                        edges = self.adjacency[u]
+                        if v in [n for (n, edge) in edges]:
+                                old = [edge for (n, edge) in edges if n == v][0]
+                                self.adjacency[u] = tuple((n, cost if n == v else edge) for (n, edge) in edges)
+                        else:
+                                self.adjacency[u] = edges + ((v, cost),)
+                start = time.perf_counter()
+                for (costs, prev) in self.tables.values():
+                        repair(self.adjacency, costs, prev, a, b, old, cost)
+                self.time += time.perf_counter() - start
+                return old
+
+        def repairMatrix(self, costs, a, b, old, new):
+                """
+                Updates a matrix returned by allPairs after the edge between a and b changed from old to new, and returns it. A list of tables is already
+                up to date, since its rows are the single-source tables. A numpy matrix is updated in place: with the new edge when the edge got cheaper,
+                and by copying a matrix computed again otherwise, so that every holder of the matrix sees the change
+                """
+                if numpy is None or not isinstance(costs, numpy.ndarray):
+                        return costs
+                start = time.perf_counter()
+                if new < old:
+                        numpy.minimum(costs, costs[:, a, None] + new + costs[None, b, :], out=costs)
+                        numpy.minimum(costs, costs[:, b, None] + new + costs[None, a, :], out=costs)
+                elif new > old:
+                        costs[:, :] = self.floydWarshall()
+                self.time += time.perf_counter() - start
+                return costs
+
+        def allPairs(self, method='auto'):
+                """
+                Returns the matrix of shortest path costs between every pair of nodes. method is 'floyd' (vectorized Floyd-Warshall, needs numpy),
+                'dijkstra' (one dijkstra per node, which also fills the single-source tables) or 'auto', which uses floyd when numpy is available
+                """
+                if method == 'auto':
+                        method = 'floyd' if numpy is not None else 'dijkstra'
+                if method == 'floyd':
+                        if numpy is None:
+                                raise ImportError("the floyd all-pairs mode needs numpy")
+                        start = time.perf_counter()
+                        costs = self.floydWarshall()
+                        self.time += time.perf_counter() - start
+                        return costs
+                elif method == 'dijkstra':
+                        return [self.distancesFrom(source) for source in range(0, len(self.adjacency))]
+                raise ValueError("unknown all-pairs method: {}".format(method))
+
+        def floydWarshall(self):
+                n = len(self.adjacency)
+                costs = numpy.full((n, n), INFINITY)
+                for (node, neighbours) in enumerate(self.adjacency):
+                        for (neighbour, edge) in neighbours:
+                                costs[node, neighbour] = min(costs[node, neighbour], edge)
+                numpy.fill_diagonal(costs, 0)
+                for k in range(0, n):
+                        numpy.minimum(costs, costs[:, k, None] + costs[None, k, :], out=costs)
+                return costs
@@ -1,12 +1,55 @@
 from search import *
 from HCB import *
+from plancache import PlanCache, fingerprint, solverName, DEFAULT_DIRECTORY
+import argparse
 import sys
 
-hcb = HCB(sys.argv[1], sys.argv[2], False)
-(lines, cost) = uniformCost(hcb.initial_state)
+parser = argparse.ArgumentParser(description="Solves an HCB problem with the Uniform Cost algorithm")
+parser.add_argument("filename")
+parser.add_argument("goalCask")
+parser.add_argument("--stats", nargs='?', const='-', default=None, metavar='PATH', help="report the search figures on stderr, or as JSON in PATH")
+parser.add_argument("--cache", action='store_true', help="keep the yard in a compiled cache file next to it, and load it from there when it's up to date")
+parser.add_argument("--macro", action='store_true', help="only stop the CTS at stacks and EXIT, moving along shortest paths between them")
+parser.add_argument("--prune", action='store_true', help="leave out the operations that the relevance analysis shows can't be part of an optimal solution")
+parser.add_argument("--plan-cache", nargs='?', const=DEFAULT_DIRECTORY, default=None, metavar='DIR', help="look the solution up in a plan cache in DIR before searching, and store it there")
+parser.add_argument("--arena", action='store_true', help="keep the search nodes in compact arrays instead of as state objects")
+parser.add_argument("--fringe", choices=sorted(fringes), default='indexed', help="fringe implementation (indexed keeps the best copy of each state, tuple every copy)")
+parser.add_argument("--node-limit", type=int, default=None, metavar='N', help="with --arena, give up when N nodes are stored (implies --arena)")
+args = parser.parse_args()
+if args.fringe != 'indexed' and (args.arena or args.node_limit is not None):
+	parser.error("--fringe doesn't work with --arena")
+
+try:
+	hcb = HCB(Yard(args.filename, args.cache), args.goalCask, False, macro=args.macro, prune=args.prune)
+except GoalCaskError as e:
+	print("{} Exiting.".format(e))
+	sys.exit(0)
+stats = SearchStats()
+cache = None
+cached = None
+if args.plan_cache is not None:
+	cache = PlanCache(args.plan_cache)
+	key = fingerprint(hcb, args.goalCask, solverName('ucs', macro=args.macro, prune=args.prune))
+	cached = cache.get(key)
+if cached is not None:
+	(lines, cost) = cached
+else:
+	if args.arena or args.node_limit is not None:
+		(lines, cost) = arenaSearch(hcb.initial_state, False, args.node_limit, stats)
+	else:
+		(lines, cost) = uniformCost(hcb.initial_state, fringes[args.fringe], stats)
+	if cache is not None and not stats.nodeLimitReached:
+		cache.put(key, lines, cost)
+hcb.recordTimes(stats)
+if cache is not None:
+	stats.planCache = cache.stats()
+if stats.nodeLimitReached:
+	sys.stderr.write("node limit reached: {} nodes stored, {} expanded\n".format(stats.nodesStored, stats.nodesExpanded))
+	lines = []
 
 for line in lines:
 	print(line)
 
 print("{}".format(cost))
-
+if args.stats is not None:
+	stats.report(args.stats)